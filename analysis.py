@@ -0,0 +1,36 @@
+"""Statement analysis: local rules first, Gemini only for what they cannot settle."""
+import llm
+from compaction import COMPACTION_VERSION
+from detector import detect_subscriptions, detect_in_transactions, merge_subscriptions, summarize, DETECTOR_VERSION
+
+# Cache key version covering the local rules, the text compaction and the Gemini prompt
+ANALYSIS_VERSION = f'{llm.PROMPT_VERSION}.{DETECTOR_VERSION}.{COMPACTION_VERSION}'
+
+
+def analyze_statement(text, analyze_remote=None):
+    analyze_remote = analyze_remote or llm.process_with_gemini
+    detection = detect_subscriptions(text)
+
+    # Nothing parsed as a transaction: the layout is unfamiliar, so let Gemini read all of it
+    if detection.transaction_count == 0:
+        return analyze_remote(text)
+    return _resolve(detection, analyze_remote)
+
+
+def analyze_transactions(transactions, analyze_remote=None):
+    """analyze_statement for transactions already parsed from the PDF layout"""
+    return _resolve(detect_in_transactions(transactions), analyze_remote or llm.process_with_gemini)
+
+
+def _resolve(detection, analyze_remote):
+    """The local result, plus whatever Gemini finds among the lines the rules left unresolved"""
+    result = detection.to_result()
+    if not detection.unresolved:
+        return result
+
+    remote = analyze_remote('\n'.join(detection.unresolved))
+    result = summarize(merge_subscriptions(result['subscriptions'], remote.get('subscriptions', [])))
+    # Keep the error so a partial result is not cached as final
+    if 'error' in remote:
+        result['error'] = remote['error']
+    return result
@@ -2,119 +2,48 @@ from flask import Flask, request, jsonify, render_template_string
 from flask_cors import CORS
 import os
 from werkzeug.utils import secure_filename
-import PyPDF2
-import pdfplumber
-import google.generativeai as genai
 from dotenv import load_dotenv
-import json
 import base64
+import logging
 from PIL import Image
 import io
+from functools import lru_cache
 
 load_dotenv()
 
+from extraction import extract_text_from_pdf, EXTRACTION_VERSION
+from analysis import analyze_statement, ANALYSIS_VERSION
+from cache import ResultCache, pdf_key, analysis_key
+from metrics import configure_logging, init_metrics, span, UPLOADS
+from spool import SpooledRequest, read_all
+
+configure_logging()
+logger = logging.getLogger('app')
+
 app = Flask(__name__)
+# Uploads are buffered per request, never written to a shared path (see spool.py)
+app.request_class = SpooledRequest
 CORS(app)
+init_metrics(app)
 
-UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf'}
 
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+@lru_cache(maxsize=None)
+def get_result_cache():
+    """Cache of extracted text and analyses, keyed by content hash.
 
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-# Use gemini-1.5-flash which is the latest available model
-model = genai.GenerativeModel('gemini-1.5-flash')
+    Opened on first use: extraction workers re-import this script (see extraction._get_pool)
+    and must not open it again.
+    """
+    return ResultCache()
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['UPLOAD_SPOOL_MAX_BYTES'] = int(os.getenv('UPLOAD_SPOOL_MAX_KB', 1024)) * 1024
+app.config['UPLOAD_SPOOL_DIR'] = os.getenv('UPLOAD_SPOOL_DIR') or None
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_pdf(pdf_path):
-    text = ""
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        print(f"[DEBUG] Extracted text length with pdfplumber: {len(text)} characters")
-    except Exception as e:
-        print(f"Error extracting text with pdfplumber: {e}")
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
-            print(f"[DEBUG] Extracted text length with PyPDF2: {len(text)} characters")
-        except Exception as e2:
-            print(f"Error extracting text with PyPDF2: {e2}")
-    
-    # Print first 500 characters for debugging
-    if text:
-        print(f"[DEBUG] First 500 chars of extracted text: {text[:500]}")
-    else:
-        print("[DEBUG] No text extracted from PDF!")
-    
-    return text
-
-def process_with_gemini(text):
-    print(f"[DEBUG] Sending {len(text)} characters to Gemini")
-    
-    prompt = """
-    Analyze this bank statement and identify all recurring subscriptions or monthly charges.
-    Look for patterns like:
-    - Netflix, Spotify, Apple Music, Amazon Prime, Disney+, YouTube Premium
-    - Software subscriptions like Adobe, Microsoft, Dropbox
-    - Utilities, phone bills, internet services
-    - Any recurring monthly or annual charges
-    
-    For each subscription found, extract:
-    1. Service/Company name
-    2. Amount charged
-    3. Date of charge
-    4. Frequency (if determinable)
-    5. Category (streaming, software, utilities, etc.)
-    
-    Return the results as a JSON array with the following structure:
-    {
-        "subscriptions": [
-            {
-                "name": "Service Name",
-                "amount": 9.99,
-                "date": "2024-01-15",
-                "frequency": "monthly",
-                "category": "streaming",
-                "confidence": 0.95
-            }
-        ],
-        "total_monthly_cost": 99.99
-    }
-    
-    Only return valid JSON, no additional text.
-    """
-    
-    try:
-        response = model.generate_content([prompt, text])
-        result_text = response.text.strip()
-        
-        print(f"[DEBUG] Gemini response: {result_text[:500]}...")
-        
-        if result_text.startswith('```json'):
-            result_text = result_text[7:]
-        if result_text.endswith('```'):
-            result_text = result_text[:-3]
-        
-        parsed_result = json.loads(result_text)
-        print(f"[DEBUG] Found {len(parsed_result.get('subscriptions', []))} subscriptions")
-        return parsed_result
-    except Exception as e:
-        print(f"[ERROR] Error processing with Gemini: {e}")
-        print(f"[ERROR] Raw response: {result_text if 'result_text' in locals() else 'No response'}")
-        return {"error": str(e), "subscriptions": [], "total_monthly_cost": 0}
-
 @app.route('/')
 def index():
     html_template = '''
@@ -254,24 +183,41 @@ def upload_file():
     
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
         
         try:
-            text = extract_text_from_pdf(filepath)
+            pdf_bytes = read_all(file.stream)
             
+            def extract():
+                with span('extract', bytes=len(pdf_bytes)):
+                    return extract_text_from_pdf(pdf_bytes)
+
+            def analyze():
+                with span('analyze', chars=len(text)):
+                    return analyze_statement(text)
+
+            text = get_result_cache().get_or_compute(pdf_key(pdf_bytes, EXTRACTION_VERSION), extract)
+            # Log sizes only: statement text is private
+            logger.debug('extracted text', extra={'fields': {'chars': len(text), 'file': filename}})
+
             if not text.strip():
+                UPLOADS.labels('failed').inc()
                 return jsonify({'error': 'Could not extract text from PDF'}), 400
-            
-            result = process_with_gemini(text)
-            
-            os.remove(filepath)
+
+            result = get_result_cache().get_or_compute(
+                analysis_key(text, ANALYSIS_VERSION),
+                analyze,
+                store_if=lambda r: 'error' not in r
+            )
+            logger.debug('analysed statement', extra={'fields': {
+                'chars': len(text), 'subscriptions': len(result.get('subscriptions', []))
+            }})
+            UPLOADS.labels('failed' if 'error' in result else 'done').inc()
             
             return jsonify(result)
         
         except Exception as e:
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            UPLOADS.labels('failed').inc()
+            logger.exception('upload failed', extra={'fields': {'file': filename}})
             return jsonify({'error': str(e)}), 500
     
     return jsonify({'error': 'Invalid file type'}), 400
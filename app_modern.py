@@ -1,50 +1,52 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, render_template, redirect, url_for, session
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from flask_migrate import Migrate
-from authlib.integrations.flask_client import OAuth
-from datetime import datetime, timedelta
+from flask_migrate import Migrate, upgrade
+from sqlalchemy import and_, or_, select, inspect as sa_inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached, validates
+from datetime import date, datetime, timedelta
 import os
 import json
+import logging
+import base64
+import click
+from flask.cli import with_appcontext
+from functools import lru_cache
+import queue
+import threading
+import time
 from werkzeug.utils import secure_filename
-import PyPDF2
-import pdfplumber
-import google.generativeai as genai
 from dotenv import load_dotenv
+try:
+    import orjson
+except ImportError:  # optional, speeds up large listings
+    orjson = None
+from jobs import JobQueue, QueueFull
+from cache import ResultCache, TTLCache, pdf_key, table_key, analysis_key, sha256_digest
+from catalog import get_subscription_info, match_catalog, catalog_listing
+from detector import monthly_equivalent, merge_subscriptions, summarize, parse_transactions, normalize_merchant
+from recurrence import find_recurring
+from forecast import forecast, MAX_HORIZON_DAYS
+from fx import fx_table, normalize_currency, convert_and_sum
+from assets import init_assets, PrecompressedBody
+from spool import SpooledRequest, detach_upload, looks_like_pdf, read_all
+from metrics import configure_logging, init_metrics, span, QUEUE_DEPTH, UPLOADS, USER_CACHE
+from database import database_url, engine_options, enable_sqlite_pragmas
 
 load_dotenv()
+configure_logging()
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///subscriptions.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-
-CORS(app, supports_credentials=True)
-
-# Initialize extensions
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
-
-# OAuth setup
-oauth = OAuth(app)
-google = oauth.register(
-    name='google',
-    client_id=os.getenv('GOOGLE_CLIENT_ID'),
-    client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    client_kwargs={
-        'scope': 'openid email profile'
-    }
-)
+logger = logging.getLogger(__name__)
+
+# Extensions are bound to an app in create_app()
+db = SQLAlchemy()
+migrate = Migrate(render_as_batch=True)
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
 
-# Gemini setup
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-1.5-flash')
+bp = Blueprint('main', __name__)
 
 # Database Models
 class User(UserMixin, db.Model):
@@ -52,13 +54,27 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(100), unique=True, nullable=False)
     name = db.Column(db.String(100))
     profile_pic = db.Column(db.String(200))
+    base_currency = db.Column(db.String(3), nullable=False, default='USD', server_default='USD')  # analytics and forecasts
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     subscriptions = db.relationship('Subscription', backref='user', lazy=True, cascade='all, delete-orphan')
 
+def normalize_name(name):
+    return ' '.join(name.lower().split())
+
 class Subscription(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'name_key', name='uq_subscription_user_name'),
+        # Dashboard and analytics filters
+        db.Index('ix_subscription_user_active', 'user_id', 'is_active'),
+        # Upcoming renewals, per user and across all users
+        db.Index('ix_subscription_user_next_billing', 'user_id', 'next_billing_date'),
+        db.Index('ix_subscription_next_billing_date', 'next_billing_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
+    name_key = db.Column(db.String(100), nullable=False)  # normalize_name(name), unique per user
     amount = db.Column(db.Float, nullable=False)
     currency = db.Column(db.String(10), default='USD')
     billing_cycle = db.Column(db.String(20), default='monthly')
@@ -71,122 +87,226 @@ class Subscription(db.Model):
     detected_from = db.Column(db.String(50))  # 'manual', 'pdf', 'email'
     confidence = db.Column(db.Float, default=1.0)
 
+    @validates('name')
+    def _sync_name_key(self, key, name):
+        # Only a real rename changes the key, so legacy duplicates keep their suffixed key (see migration 0002)
+        if self.name is None or normalize_name(name) != normalize_name(self.name):
+            self.name_key = normalize_name(name)
+        return name
+
 class StatementUpload(db.Model):
+    __table_args__ = (
+        db.Index('ix_statement_upload_user_uploaded', 'user_id', 'uploaded_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     filename = db.Column(db.String(200))
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     processed = db.Column(db.Boolean, default=False)
     subscriptions_found = db.Column(db.Integer, default=0)
+    status = db.Column(db.String(20), default='queued')  # 'queued', 'processing', 'done', 'failed'
+    result = db.Column(db.Text)  # JSON returned by the analysis
+    error = db.Column(db.Text)
+    completed_at = db.Column(db.DateTime)
+
+class UserAnalytics(db.Model):
+    """Running totals behind /api/analytics, updated in the same transaction as every subscription change.
+
+    Totals are kept in each subscription's own currency and converted to the user's base currency on read,
+    so neither a rate update nor a base currency change invalidates them.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    subscription_count = db.Column(db.Integer, nullable=False, default=0)
+    by_category = db.Column(db.Text, nullable=False, default='{}')  # JSON {category: {currency: [monthly_total, count]}}
+    version = db.Column(db.Integer, nullable=False, default=0)  # exposed as the ETag
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Transaction(db.Model):
+    """A statement line kept for cross-statement recurrence detection"""
+    __table_args__ = (
+        # Re-uploading a statement must not duplicate its lines, but identical charges within one are real
+        db.UniqueConstraint('user_id', 'statement_sha256', 'line_index', name='uq_transaction_user_statement_line'),
+        db.Index('ix_transaction_user_merchant_date', 'user_id', 'merchant', 'date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    upload_id = db.Column(db.Integer, db.ForeignKey('statement_upload.id'))
+    statement_sha256 = db.Column(db.String(64), nullable=False)  # of the uploaded PDF
+    line_index = db.Column(db.Integer, nullable=False)  # position among the statement's transactions
+    date = db.Column(db.Date, nullable=False)
+    descriptor = db.Column(db.String(255), nullable=False)
+    merchant = db.Column(db.String(100), nullable=False)  # detector.normalize_merchant(descriptor)
+    amount = db.Column(db.Float, nullable=False)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
-
-# Subscription catalog with logos
-SUBSCRIPTION_CATALOG = {
-    'netflix': {'name': 'Netflix', 'category': 'streaming', 'logo': '🎬'},
-    'spotify': {'name': 'Spotify', 'category': 'streaming', 'logo': '🎵'},
-    'amazon prime': {'name': 'Amazon Prime', 'category': 'streaming', 'logo': '📦'},
-    'disney': {'name': 'Disney+', 'category': 'streaming', 'logo': '🏰'},
-    'chatgpt': {'name': 'ChatGPT Plus', 'category': 'software', 'logo': '🤖'},
-    'adobe': {'name': 'Adobe Creative Cloud', 'category': 'software', 'logo': '🎨'},
-    'microsoft': {'name': 'Microsoft 365', 'category': 'software', 'logo': '📊'},
-    'dropbox': {'name': 'Dropbox', 'category': 'storage', 'logo': '☁️'},
-    'apple': {'name': 'Apple Services', 'category': 'various', 'logo': '🍎'},
-    'google': {'name': 'Google Services', 'category': 'various', 'logo': '🔍'},
+    """The logged-in user, from a per-process TTL cache so most requests skip the lookup"""
+    user_id = int(user_id)
+    users = service('user_cache')
+    cached = users.get(user_id)
+    if cached is None:
+        USER_CACHE.labels('miss').inc()
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        # Cache a detached copy; the instance this session loaded stays untouched
+        cached = User(**{attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs})
+        make_transient_to_detached(cached)
+        users.set(user_id, cached)
+        return user
+    USER_CACHE.labels('hit').inc()
+    # Attach a copy to this request's session without a SELECT
+    return db.session.merge(cached, load=False)
+
+def analytics_contribution(sub):
+    """What one subscription adds to its owner's analytics: (category, currency, monthly amount), or None if inactive"""
+    if not sub.is_active:
+        return None
+    return sub.category or 'other', normalize_currency(sub.currency), monthly_equivalent(float(sub.amount), sub.billing_cycle)
+
+def add_contribution(by_category, contribution, sign=1):
+    """Apply one contribution to a by_category mapping in place; returns the change in subscription count"""
+    if contribution is None:
+        return 0
+    category, currency, monthly_amount = contribution
+    currencies = by_category.setdefault(category, {})
+    entry = currencies.setdefault(currency, [0.0, 0])
+    entry[0] += sign * monthly_amount
+    entry[1] += sign
+    if entry[1] <= 0:
+        del currencies[currency]
+        if not currencies:
+            del by_category[category]
+    return sign
+
+def compute_analytics(user_id):
+    """Recompute a user's totals from their subscriptions"""
+    rows = db.session.query(
+        Subscription.category, Subscription.currency, Subscription.amount, Subscription.billing_cycle,
+        Subscription.is_active
+    ).filter_by(user_id=user_id, is_active=True)
+
+    count = 0
+    by_category = {}
+    for row in rows:
+        count += add_contribution(by_category, analytics_contribution(row))
+    return count, by_category
+
+def rebuild_analytics(user_id, analytics=None):
+    analytics = analytics or db.session.get(UserAnalytics, user_id)
+    if analytics is None:
+        analytics = UserAnalytics(user_id=user_id, version=0)
+        db.session.add(analytics)
+
+    count, by_category = compute_analytics(user_id)
+    analytics.subscription_count = count
+    analytics.by_category = json.dumps(by_category)
+    analytics.version = (analytics.version or 0) + 1
+    return analytics
+
+def update_analytics(user_id, removed=(), added=()):
+    """Move subscription contributions out of and into a user's totals. Call before committing."""
+    analytics = UserAnalytics.query.filter_by(user_id=user_id).with_for_update().first()
+
+    # No totals yet (e.g. a user from before this table existed): build them from scratch,
+    # which already reflects the pending change
+    if analytics is None:
+        return rebuild_analytics(user_id)
+
+    by_category = json.loads(analytics.by_category)
+    for sign, contributions in ((-1, removed), (1, added)):
+        for contribution in contributions:
+            analytics.subscription_count += add_contribution(by_category, contribution, sign)
+
+    analytics.by_category = json.dumps(by_category)
+    analytics.version += 1
+    return analytics
+
+def get_user_analytics(user_id):
+    analytics = db.session.get(UserAnalytics, user_id)
+    if analytics is None:
+        analytics = rebuild_analytics(user_id)
+        db.session.commit()
+    return analytics
+
+def converted_totals(by_category, base_currency):
+    """Monthly totals per category in the base currency: ({category: total}, total, currencies without a rate)"""
+    categories, currencies, amounts = [], [], []
+    for category, per_currency in by_category.items():
+        for currency, (monthly_total, _) in per_currency.items():
+            categories.append(category)
+            currencies.append(currency)
+            amounts.append(monthly_total)
+    return convert_and_sum(categories, amounts, currencies, base_currency)
+
+# Per-app state, created on first use so that nothing opens files, connections or threads
+# before a preforking server forks its workers
+def _build_upload_queue(config):
+    return JobQueue(max_workers=config['UPLOAD_WORKERS'], max_depth=config['UPLOAD_QUEUE_DEPTH'], name='upload',
+                    on_depth_change=QUEUE_DEPTH.set)
+
+def _build_result_cache(config):
+    # Cache of extracted text and analyses, keyed by content hash
+    return ResultCache(
+        path=config['RESULT_CACHE_PATH'],
+        max_bytes=config['RESULT_CACHE_MAX_BYTES'],
+        ttl=config['RESULT_CACHE_TTL']
+    )
+
+def _build_google(config):
+    # authlib is slow to import and only the login flow needs it
+    from authlib.integrations.flask_client import OAuth
+
+    oauth = OAuth(current_app)
+    return oauth.register(
+        name='google',
+        client_id=os.getenv('GOOGLE_CLIENT_ID'),
+        client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
+        server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+        client_kwargs={
+            'scope': 'openid email profile'
+        }
+    )
+
+def _build_index_page(config):
+    # The page has no per-user content, so it is rendered and compressed once
+    html = render_template('index.html')
+    return PrecompressedBody(html, 'text/html', sha256_digest(html)[:16])
+
+LAZY_SERVICES = {
+    'upload_queue': _build_upload_queue,
+    'result_cache': _build_result_cache,
+    'google': _build_google,
+    'index_page': _build_index_page,
 }
+_services_lock = threading.Lock()
 
-def extract_text_from_pdf(pdf_path):
-    text = ""
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-    except Exception as e:
-        print(f"Error with pdfplumber: {e}")
-        try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
-        except Exception as e2:
-            print(f"Error with PyPDF2: {e2}")
-    
-    return text
-
-def process_with_gemini(text):
-    prompt = """
-    Analyze this bank statement and identify all recurring subscriptions or monthly charges.
-    Look for patterns like:
-    - Netflix, Spotify, Apple Music, Amazon Prime, Disney+, YouTube Premium
-    - Software subscriptions like Adobe, Microsoft, Dropbox, ChatGPT
-    - Utilities, phone bills, internet services
-    - Any recurring monthly or annual charges
-    
-    For each subscription found, extract:
-    1. Service/Company name
-    2. Amount charged
-    3. Date of charge
-    4. Frequency (if determinable)
-    5. Category (streaming, software, utilities, etc.)
-    
-    Return the results as a JSON array with the following structure:
-    {
-        "subscriptions": [
-            {
-                "name": "Service Name",
-                "amount": 9.99,
-                "date": "2024-01-15",
-                "frequency": "monthly",
-                "category": "streaming",
-                "confidence": 0.95
-            }
-        ],
-        "total_monthly_cost": 99.99
-    }
-    
-    Only return valid JSON, no additional text.
-    """
-    
-    try:
-        response = model.generate_content([prompt, text])
-        result_text = response.text.strip()
-        
-        if result_text.startswith('```json'):
-            result_text = result_text[7:]
-        if result_text.endswith('```'):
-            result_text = result_text[:-3]
-        
-        return json.loads(result_text)
-    except Exception as e:
-        print(f"Error processing with Gemini: {e}")
-        return {"error": str(e), "subscriptions": [], "total_monthly_cost": 0}
-
-def get_subscription_info(name):
-    """Get subscription info from catalog"""
-    name_lower = name.lower()
-    for key, info in SUBSCRIPTION_CATALOG.items():
-        if key in name_lower:
-            return info
-    return {'name': name, 'category': 'other', 'logo': '💳'}
+def service(name):
+    """The current app's instance of a LAZY_SERVICES entry or of state set up in create_app"""
+    services = current_app.extensions['subscriptions']
+    if name not in services:
+        with _services_lock:
+            if name not in services:
+                services[name] = LAZY_SERVICES[name](current_app.config)
+    return services[name]
 
 # Routes
-@app.route('/')
+@bp.route('/')
 def index():
-    return render_template('index.html')
+    if current_app.debug:
+        return _build_index_page(current_app.config).response()
+    return service('index_page').response()
 
-@app.route('/api/auth/login')
+@bp.route('/api/auth/login')
 def login():
-    redirect_uri = url_for('auth_callback', _external=True)
-    return google.authorize_redirect(redirect_uri)
+    redirect_uri = url_for('main.auth_callback', _external=True)
+    return service('google').authorize_redirect(redirect_uri)
 
-@app.route('/api/auth/callback')
+@bp.route('/api/auth/callback')
 def auth_callback():
-    token = google.authorize_access_token()
+    token = service('google').authorize_access_token()
     user_info = token.get('userinfo')
     
     if user_info:
@@ -200,49 +320,176 @@ def auth_callback():
             )
             db.session.add(user)
             db.session.commit()
+        elif (user.name, user.profile_pic) != (user_info.get('name'), user_info.get('picture')):
+            # Keep the profile in step with Google and drop this worker's cached copy
+            user.name = user_info.get('name')
+            user.profile_pic = user_info.get('picture')
+            db.session.commit()
+            service('user_cache').invalidate(user.id)
         
         login_user(user)
         return redirect('/')
     
     return redirect('/')
 
-@app.route('/api/auth/logout')
+@bp.route('/api/auth/logout')
 @login_required
 def logout():
     logout_user()
     return redirect('/')
 
-@app.route('/api/user')
+@bp.route('/api/user', methods=['GET', 'PATCH'])
 @login_required
 def get_user():
+    if request.method == 'PATCH':
+        data = request.json or {}
+        if 'base_currency' in data:
+            if data['base_currency'] not in fx_table():
+                return jsonify({'error': f"Unsupported currency: {data['base_currency']}"}), 400
+            current_user.base_currency = normalize_currency(data['base_currency'])
+        db.session.commit()
+        service('user_cache').invalidate(current_user.id)
+
     return jsonify({
         'id': current_user.id,
         'email': current_user.email,
         'name': current_user.name,
-        'profile_pic': current_user.profile_pic
+        'profile_pic': current_user.profile_pic,
+        'base_currency': current_user.base_currency
     })
 
-@app.route('/api/subscriptions', methods=['GET', 'POST'])
+SUBSCRIPTION_FIELDS = [
+    'id', 'name', 'amount', 'currency', 'billing_cycle', 'category', 'next_billing_date',
+    'is_active', 'logo_url', 'detected_from', 'confidence'
+]
+SORTABLE_FIELDS = {'id', 'name', 'amount', 'next_billing_date', 'created_at'}
+
+def parse_bool(value):
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f'Invalid boolean: {value}')
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """[is_null, value, last_id] from a cursor made by encode_cursor; ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ValueError('Invalid cursor')
+    if not (isinstance(values, list) and len(values) == 3 and isinstance(values[0], bool)
+            and isinstance(values[1], (str, int, float, type(None))) and type(values[2]) is int):
+        raise ValueError('Invalid cursor')
+    return values
+
+def keyset_after(column, descending, is_null, value, last_id):
+    """Rows after (value, id) in an ordering that puts NULLs last"""
+    if is_null:
+        return and_(column.is_(None), Subscription.id < last_id if descending else Subscription.id > last_id)
+    beyond = column < value if descending else column > value
+    same_value_later_id = and_(column == value, Subscription.id < last_id if descending else Subscription.id > last_id)
+    return or_(and_(column.isnot(None), or_(beyond, same_value_later_id)), column.is_(None))
+
+def list_subscriptions(user_id, args):
+    """GET /api/subscriptions with optional filters, field projection and keyset pagination.
+
+    Without `limit` every matching row is returned, as before. With it, the
+    cursor for the next page is sent in the X-Next-Cursor header.
+    """
+    fields = SUBSCRIPTION_FIELDS
+    if args.get('fields'):
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = set(fields) - set(SUBSCRIPTION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+
+    sort = args.get('sort', 'id')
+    descending = sort.startswith('-')
+    sort_field = sort.lstrip('-')
+    if sort_field not in SORTABLE_FIELDS:
+        raise ValueError(f'Cannot sort by {sort_field}')
+    sort_column = getattr(Subscription, sort_field)
+
+    # Only the requested columns are selected, plus what the cursor needs
+    selected = list(dict.fromkeys(fields + ['id', sort_field]))
+    query = db.session.query(*[getattr(Subscription, f) for f in selected]).filter(Subscription.user_id == user_id)
+
+    if args.get('category'):
+        query = query.filter(Subscription.category == args['category'])
+    if args.get('is_active'):
+        query = query.filter(Subscription.is_active == parse_bool(args['is_active']))
+    if args.get('billing_within'):
+        today = datetime.utcnow().date()
+        query = query.filter(Subscription.next_billing_date.between(
+            today, today + timedelta(days=int(args['billing_within']))
+        ))
+
+    if args.get('cursor'):
+        is_null, value, last_id = decode_cursor(args['cursor'])
+        if value is not None and sort_field in ('next_billing_date', 'created_at') and not isinstance(value, str):
+            raise ValueError('Invalid cursor')
+        if value is not None and sort_field == 'next_billing_date':
+            value = datetime.strptime(value, '%Y-%m-%d').date()
+        elif value is not None and sort_field == 'created_at':
+            value = datetime.fromisoformat(value)
+        query = query.filter(keyset_after(sort_column, descending, is_null, value, last_id))
+
+    query = query.order_by(
+        sort_column.is_(None),
+        sort_column.desc() if descending else sort_column,
+        Subscription.id.desc() if descending else Subscription.id
+    )
+
+    limit = None
+    if args.get('limit'):
+        limit = min(int(args['limit']), current_app.config['SUBSCRIPTIONS_MAX_PAGE_SIZE'])
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        query = query.limit(limit + 1)
+
+    rows = query.all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]._mapping
+        value = last[sort_field]
+        next_cursor = encode_cursor([value is None, value.isoformat() if hasattr(value, 'isoformat') else value, last['id']])
+
+    items = []
+    for row in rows:
+        mapping = row._mapping
+        item = {}
+        for field in fields:
+            value = mapping[field]
+            item[field] = value.isoformat() if field == 'next_billing_date' and value else value
+        items.append(item)
+
+    if orjson is not None and current_app.config['FAST_JSON']:
+        response = Response(orjson.dumps(items), mimetype='application/json')
+    else:
+        response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("main.handle_subscriptions", **{**args.to_dict(), "cursor": next_cursor})}>; rel="next"'
+    return response
+
+@bp.route('/api/subscriptions', methods=['GET', 'POST'])
 @login_required
 def handle_subscriptions():
     if request.method == 'GET':
-        subscriptions = Subscription.query.filter_by(user_id=current_user.id).all()
-        return jsonify([{
-            'id': sub.id,
-            'name': sub.name,
-            'amount': sub.amount,
-            'currency': sub.currency,
-            'billing_cycle': sub.billing_cycle,
-            'category': sub.category,
-            'next_billing_date': sub.next_billing_date.isoformat() if sub.next_billing_date else None,
-            'is_active': sub.is_active,
-            'logo_url': sub.logo_url,
-            'detected_from': sub.detected_from,
-            'confidence': sub.confidence
-        } for sub in subscriptions])
+        try:
+            return list_subscriptions(current_user.id, request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     
     elif request.method == 'POST':
         data = request.json
+        currency = data.get('currency', current_user.base_currency)
+        if currency not in fx_table():
+            return jsonify({'error': f'Unsupported currency: {currency}'}), 400
         
         # Get subscription info from catalog
         sub_info = get_subscription_info(data.get('name', ''))
@@ -251,7 +498,7 @@ def handle_subscriptions():
             user_id=current_user.id,
             name=sub_info['name'],
             amount=data.get('amount', 0),
-            currency=data.get('currency', 'USD'),
+            currency=normalize_currency(currency),
             billing_cycle=data.get('billing_cycle', 'monthly'),
             category=sub_info['category'],
             next_billing_date=datetime.strptime(data['next_billing_date'], '%Y-%m-%d').date() if data.get('next_billing_date') else None,
@@ -262,17 +509,31 @@ def handle_subscriptions():
         )
         
         db.session.add(subscription)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': f"{subscription.name} is already being tracked"}), 409
+        
+        update_analytics(current_user.id, added=[analytics_contribution(subscription)])
         db.session.commit()
         
         return jsonify({'id': subscription.id, 'message': 'Subscription added successfully'}), 201
 
-@app.route('/api/subscriptions/<int:id>', methods=['PUT', 'DELETE'])
+@bp.route('/api/subscriptions/<int:id>', methods=['PUT', 'DELETE'])
 @login_required
 def handle_subscription(id):
     subscription = Subscription.query.filter_by(id=id, user_id=current_user.id).first_or_404()
     
+    # Its share of the user's analytics before this change
+    before = analytics_contribution(subscription)
+    
     if request.method == 'PUT':
         data = request.json
+        if 'currency' in data:
+            if data['currency'] not in fx_table():
+                return jsonify({'error': f"Unsupported currency: {data['currency']}"}), 400
+            subscription.currency = normalize_currency(data['currency'])
         subscription.name = data.get('name', subscription.name)
         subscription.amount = data.get('amount', subscription.amount)
         subscription.billing_cycle = data.get('billing_cycle', subscription.billing_cycle)
@@ -282,15 +543,253 @@ def handle_subscription(id):
         if data.get('next_billing_date'):
             subscription.next_billing_date = datetime.strptime(data['next_billing_date'], '%Y-%m-%d').date()
         
+        name = subscription.name
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': f"{name} is already being tracked"}), 409
+        
+        update_analytics(current_user.id, removed=[before], added=[analytics_contribution(subscription)])
         db.session.commit()
         return jsonify({'message': 'Subscription updated successfully'})
     
     elif request.method == 'DELETE':
         db.session.delete(subscription)
+        update_analytics(current_user.id, removed=[before])
         db.session.commit()
         return jsonify({'message': 'Subscription deleted successfully'})
 
-@app.route('/api/upload', methods=['POST'])
+def insert_ignoring_duplicates(model, index_elements):
+    """INSERT that silently skips rows colliding with a unique constraint"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return model.__table__.insert().prefix_with('IGNORE')
+    return insert(model).on_conflict_do_nothing(index_elements=index_elements)
+
+def save_transactions(user_id, upload_id, statement_sha256, transactions):
+    """Add parsed statement lines to the user's ledger, skipping the statement's lines already stored.
+
+    Call before committing.
+    """
+    rows = [
+        {
+            'user_id': user_id,
+            'upload_id': upload_id,
+            'statement_sha256': statement_sha256,
+            'line_index': i,
+            'date': tx.date,
+            'descriptor': tx.descriptor[:255],
+            'merchant': normalize_merchant(tx.descriptor)[:100],
+            'amount': tx.amount
+        }
+        for i, tx in enumerate(transactions)
+    ]
+    if rows:
+        db.session.execute(
+            insert_ignoring_duplicates(Transaction, ['user_id', 'statement_sha256', 'line_index']), rows
+        )
+    return len(rows)
+
+def save_detected_subscriptions(user_id, detected, default_currency='USD'):
+    """Add detections the user doesn't already track: one lookup and one bulk insert.
+
+    Detections without a recognised currency are assumed to be in `default_currency`.
+    """
+    fx = fx_table()
+    rows = {}
+    for sub_data in detected:
+        sub_info = get_subscription_info(sub_data['name'])
+        name_key = normalize_name(sub_info['name'])
+        if name_key in rows:
+            continue
+        rows[name_key] = {
+            'user_id': user_id,
+            'name': sub_info['name'],
+            'name_key': name_key,
+            'amount': sub_data['amount'],
+            'currency': normalize_currency(sub_data['currency']) if sub_data.get('currency') in fx else default_currency,
+            'billing_cycle': sub_data.get('frequency', 'monthly'),
+            'category': sub_info['category'],
+            'logo_url': sub_info.get('logo'),
+            'detected_from': 'pdf',
+            'confidence': sub_data.get('confidence', 0.9)
+        }
+
+    if not rows:
+        return 0
+
+    # Check which subscriptions already exist
+    existing = {
+        name_key for (name_key,) in db.session.query(Subscription.name_key).filter(
+            Subscription.user_id == user_id,
+            Subscription.name_key.in_(rows)
+        )
+    }
+    new_rows = [row for name_key, row in rows.items() if name_key not in existing]
+
+    # A concurrent upload may insert the same subscription between the lookup and here;
+    # the unique constraint turns that into a no-op instead of a duplicate. Existing
+    # rows are left as they are so user edits are never overwritten by a detection.
+    if not new_rows:
+        return 0
+
+    statement = insert_ignoring_duplicates(Subscription, ['user_id', 'name_key'])
+    if db.session.get_bind().dialect.insert_executemany_returning:
+        # Only rows that were actually inserted come back, so the totals stay exact under races
+        inserted = db.session.execute(statement.returning(
+            Subscription.category, Subscription.currency, Subscription.amount, Subscription.billing_cycle,
+            Subscription.is_active
+        ), new_rows).all()
+        update_analytics(user_id, added=[analytics_contribution(row) for row in inserted])
+        return len(inserted)
+
+    db.session.execute(statement, new_rows)
+    rebuild_analytics(user_id)
+    return len(new_rows)
+
+def process_upload(app, upload_id, stream, progress=None):
+    """Extract and analyse an uploaded statement on a background worker. Closes `stream`.
+
+    `progress(stage, **details)` is called as the job moves through extracting, analysing,
+    saving and finally done or failed.
+    """
+    # The PDF and LLM stacks dominate start-up time, so they load with the first upload
+    from extraction import extract_text_from_pdf, EXTRACTION_VERSION
+    from layout import extract_transactions, TransactionColumns, LAYOUT_VERSION
+    from analysis import analyze_statement, analyze_transactions, ANALYSIS_VERSION
+
+    progress = progress or (lambda stage, **details: None)
+    finished = False
+    try:
+        with app.app_context():
+            result_cache = service('result_cache')
+            try:
+                upload = db.session.get(StatementUpload, upload_id)
+                upload.status = 'processing'
+                db.session.commit()
+            except Exception:
+                logger.exception('Upload %d could not be started', upload_id)
+                stream.close()
+                raise
+
+            try:
+                pdf_bytes = read_all(stream)
+                workers = current_app.config['PDF_EXTRACT_WORKERS']
+
+                def extract():
+                    with span('extract', bytes=len(pdf_bytes)):
+                        return extract_text_from_pdf(pdf_bytes, workers)
+
+                def extract_table():
+                    with span('extract', bytes=len(pdf_bytes), mode='table') as fields:
+                        columns = extract_transactions(pdf_bytes, workers)
+                        fields['rows'] = len(columns)
+                        return columns.to_json()
+
+                def analyze():
+                    with span('analyze', chars=len(text)):
+                        return analyze_statement(text)
+
+                def analyze_rows():
+                    with span('analyze', rows=len(transactions)):
+                        return analyze_transactions(transactions)
+
+                # Extract transaction rows from the page layout, or the text of the PDF
+                progress('extracting')
+                columns = None
+                if current_app.config['PDF_EXTRACT_MODE'] == 'table':
+                    columns = TransactionColumns.from_json(
+                        result_cache.get_or_compute(table_key(pdf_bytes, LAYOUT_VERSION), extract_table)
+                    )
+
+                if columns:
+                    transactions = columns.transactions()
+                    key, compute = analysis_key(json.dumps(columns.to_json()), ANALYSIS_VERSION), analyze_rows
+                else:
+                    # Text mode, or a layout without recognisable rows that Gemini has to read
+                    text = result_cache.get_or_compute(pdf_key(pdf_bytes, EXTRACTION_VERSION), extract)
+                    if not text.strip():
+                        raise ValueError('Could not extract text from PDF')
+                    transactions = parse_transactions(text)
+                    key, compute = analysis_key(text, ANALYSIS_VERSION), analyze
+
+                # Detect locally, then ask Gemini about anything unresolved.
+                # Failed analyses are not cached so a retry calls Gemini again
+                progress('analysing')
+                result = result_cache.get_or_compute(key, compute, store_if=lambda r: 'error' not in r)
+
+                # Add found subscriptions to database
+                progress('saving')
+                with service('save_lock'), span('db_commit', upload_id=upload_id):
+                    save_transactions(upload.user_id, upload.id, sha256_digest(pdf_bytes), transactions)
+                    save_detected_subscriptions(upload.user_id, result.get('subscriptions', []),
+                                                db.session.get(User, upload.user_id).base_currency)
+
+                    upload.status = 'done'
+                    upload.processed = True
+                    upload.subscriptions_found = len(result.get('subscriptions', []))
+                    upload.result = json.dumps(result)
+                    upload.completed_at = datetime.utcnow()
+                    db.session.commit()
+                UPLOADS.labels('done').inc()
+                progress('done', result=result)
+                finished = True
+
+            except Exception as e:
+                logger.exception('Upload %d failed', upload_id)
+                db.session.rollback()
+                upload.status = 'failed'
+                upload.error = str(e)
+                upload.completed_at = datetime.utcnow()
+                db.session.commit()
+                UPLOADS.labels('failed').inc()
+                progress('failed', error=str(e))
+                finished = True
+
+            finally:
+                # No-op unless reading failed part way
+                stream.close()
+    finally:
+        # Batch streams wait for done or failed, so send one even if recording the failure failed too
+        if not finished:
+            progress('failed', error='Processing failed')
+
+def expire_stale_upload(upload):
+    """Fail an upload left queued or processing for longer than UPLOAD_STALE_MINUTES.
+
+    Its job died without recording an outcome, e.g. in a worker that was restarted, and pollers would
+    otherwise wait forever. A job that is merely slow and finishes later still records its result.
+    """
+    limit = timedelta(minutes=current_app.config['UPLOAD_STALE_MINUTES'])
+    if upload.status in ('queued', 'processing') and upload.uploaded_at < datetime.utcnow() - limit:
+        upload.status = 'failed'
+        upload.error = 'Processing did not finish, please upload the statement again'
+        upload.completed_at = datetime.utcnow()
+        db.session.commit()
+        UPLOADS.labels('failed').inc()
+    return upload
+
+def serialize_upload(upload):
+    data = {
+        'job_id': upload.id,
+        'status': upload.status,
+        'filename': upload.filename,
+        'uploaded_at': upload.uploaded_at.isoformat() if upload.uploaded_at else None,
+        'completed_at': upload.completed_at.isoformat() if upload.completed_at else None,
+        'subscriptions_found': upload.subscriptions_found
+    }
+    if upload.status == 'done' and upload.result:
+        data['result'] = json.loads(upload.result)
+    if upload.status == 'failed':
+        data['error'] = upload.error
+    return data
+
+@bp.route('/api/upload', methods=['POST'])
 @login_required
 def upload_file():
     if 'file' not in request.files:
@@ -301,127 +800,323 @@ def upload_file():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
-    if file and file.filename.lower().endswith('.pdf'):
+    if file and file.filename.lower().endswith('.pdf') and looks_like_pdf(file.stream):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
+        # The job owns the in-memory (or anonymous temp file) buffer from here on
+        stream = detach_upload(file)
+
         try:
-            # Extract text from PDF
-            text = extract_text_from_pdf(filepath)
-            
-            if not text.strip():
-                return jsonify({'error': 'Could not extract text from PDF'}), 400
-            
-            # Process with Gemini
-            result = process_with_gemini(text)
-            
-            # Save upload record
+            # Save upload record; it doubles as the job's state
             upload = StatementUpload(
                 user_id=current_user.id,
                 filename=filename,
-                processed=True,
-                subscriptions_found=len(result.get('subscriptions', []))
+                status='queued'
             )
             db.session.add(upload)
-            
-            # Add found subscriptions to database
-            for sub_data in result.get('subscriptions', []):
-                # Check if subscription already exists
-                existing = Subscription.query.filter_by(
-                    user_id=current_user.id,
-                    name=sub_data['name']
-                ).first()
-                
-                if not existing:
-                    sub_info = get_subscription_info(sub_data['name'])
-                    
-                    subscription = Subscription(
-                        user_id=current_user.id,
-                        name=sub_info['name'],
-                        amount=sub_data['amount'],
-                        currency='USD',
-                        billing_cycle=sub_data.get('frequency', 'monthly'),
-                        category=sub_info['category'],
-                        logo_url=sub_info.get('logo'),
-                        detected_from='pdf',
-                        confidence=sub_data.get('confidence', 0.9)
-                    )
-                    db.session.add(subscription)
-            
             db.session.commit()
-            
-            # Clean up file
-            os.remove(filepath)
-            
-            return jsonify(result)
+            service('upload_queue').submit(process_upload, current_app._get_current_object(), upload.id, stream)
+        except QueueFull:
+            stream.close()
+            db.session.delete(upload)
+            db.session.commit()
+            response = jsonify({'error': 'Too many uploads in progress, please try again shortly'})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        except Exception:
+            stream.close()
+            raise
         
-        except Exception as e:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            return jsonify({'error': str(e)}), 500
+        response = jsonify(serialize_upload(upload))
+        response.headers['Location'] = url_for('main.get_upload_status', job_id=upload.id)
+        return response, 202
     
     return jsonify({'error': 'Invalid file type'}), 400
 
-@app.route('/api/analytics')
+def sse_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+@bp.route('/api/upload/batch', methods=['POST'])
+@login_required
+def upload_batch():
+    """Queue several statements at once and stream their progress as Server-Sent Events.
+
+    Events: `queued` (the job list), `progress` (one per file and stage) and a final
+    `complete` carrying the detections of all files merged and de-duplicated. After
+    UPLOAD_BATCH_TIMEOUT seconds `complete` is sent anyway, listing unfinished jobs as `pending`.
+    """
+    files = [f for f in request.files.getlist('files') if f.filename]
+    if not files:
+        return jsonify({'error': 'No files provided'}), 400
+    if len(files) > current_app.config['UPLOAD_BATCH_MAX_FILES']:
+        return jsonify({'error': f"At most {current_app.config['UPLOAD_BATCH_MAX_FILES']} files per batch"}), 400
+
+    invalid = [f.filename for f in files if not (f.filename.lower().endswith('.pdf') and looks_like_pdf(f.stream))]
+    if invalid:
+        return jsonify({'error': 'Invalid file type', 'files': invalid}), 400
+
+    uploads = [StatementUpload(user_id=current_user.id, filename=secure_filename(f.filename), status='queued')
+               for f in files]
+    streams = [detach_upload(f) for f in files]
+    events = queue.Queue()
+
+    def reporter(job_id, filename):
+        def progress(stage, **details):
+            events.put(dict(details, job_id=job_id, filename=filename, stage=stage))
+        return progress
+
+    try:
+        db.session.add_all(uploads)
+        db.session.commit()
+        app = current_app._get_current_object()
+        service('upload_queue').submit_all(process_upload, [
+            (app, upload.id, stream, reporter(upload.id, upload.filename)) for upload, stream in zip(uploads, streams)
+        ])
+    except QueueFull:
+        for stream in streams:
+            stream.close()
+        for upload in uploads:
+            db.session.delete(upload)
+        db.session.commit()
+        response = jsonify({'error': 'Too many uploads in progress, please try again shortly'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    except Exception:
+        for stream in streams:
+            stream.close()
+        raise
+
+    jobs = [{'job_id': upload.id, 'filename': upload.filename} for upload in uploads]
+    deadline = time.monotonic() + current_app.config['UPLOAD_BATCH_TIMEOUT']
+
+    def generate():
+        yield sse_event('queued', {'jobs': jobs})
+        results, failed = {}, []
+        while len(results) + len(failed) < len(jobs):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = events.get(timeout=min(15, remaining))
+            except queue.Empty:
+                # Comment line keeps proxies from closing an idle stream
+                yield ': keep-alive\n\n'
+                continue
+
+            if event['stage'] == 'done':
+                results[event['job_id']] = event.pop('result')
+                event['subscriptions_found'] = len(results[event['job_id']].get('subscriptions', []))
+            elif event['stage'] == 'failed':
+                failed.append(event['job_id'])
+            yield sse_event('progress', event)
+
+        # Merge in upload order so the earliest statement wins ties
+        merged = summarize(merge_subscriptions(*(
+            results[job['job_id']].get('subscriptions', []) for job in jobs if job['job_id'] in results
+        )))
+        pending = [job['job_id'] for job in jobs if job['job_id'] not in results and job['job_id'] not in failed]
+        yield sse_event('complete', {'result': merged, 'files': len(jobs), 'failed': failed, 'pending': pending})
+
+    # Jobs keep running if the client goes away; their results stay available via /api/upload/<id>
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@bp.app_errorhandler(413)
+def upload_too_large(e):
+    limit_mb = current_app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    return jsonify({'error': f'File too large (limit {limit_mb} MB)'}), 413
+
+@bp.route('/api/upload/<int:job_id>')
+@login_required
+def get_upload_status(job_id):
+    upload = StatementUpload.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    return jsonify(serialize_upload(expire_stale_upload(upload)))
+
+@bp.route('/api/transactions/recurring')
+@login_required
+def get_recurring_transactions():
+    """Merchants that charge on a regular cycle across every statement the user has uploaded"""
+    rows = db.session.execute(
+        select(Transaction.merchant, Transaction.date, Transaction.amount)
+        .where(Transaction.user_id == current_user.id, Transaction.merchant != '')
+    ).all()
+    if not rows:
+        return jsonify([])
+    merchants, dates, amounts = zip(*rows)
+    return jsonify(find_recurring(merchants, dates, amounts))
+
+@bp.route('/api/analytics')
 @login_required
 def get_analytics():
-    subscriptions = Subscription.query.filter_by(user_id=current_user.id, is_active=True).all()
-    
-    # Calculate analytics
-    total_monthly = 0
-    total_yearly = 0
-    by_category = {}
+    analytics = get_user_analytics(current_user.id)
+    base_currency = current_user.base_currency
+    by_category, total_monthly, unconverted = converted_totals(json.loads(analytics.by_category), base_currency)
+    count = analytics.subscription_count
     
-    for sub in subscriptions:
-        monthly_amount = sub.amount
-        if sub.billing_cycle == 'yearly':
-            monthly_amount = sub.amount / 12
-        elif sub.billing_cycle == 'weekly':
-            monthly_amount = sub.amount * 4.33
-        
-        total_monthly += monthly_amount
-        total_yearly += monthly_amount * 12
-        
-        if sub.category not in by_category:
-            by_category[sub.category] = 0
-        by_category[sub.category] += monthly_amount
-    
-    return jsonify({
+    data = {
+        'currency': base_currency,
         'total_monthly': round(total_monthly, 2),
-        'total_yearly': round(total_yearly, 2),
+        'total_yearly': round(total_monthly * 12, 2),
         'by_category': {k: round(v, 2) for k, v in by_category.items()},
-        'subscription_count': len(subscriptions),
-        'average_subscription': round(total_monthly / len(subscriptions), 2) if subscriptions else 0
-    })
+        'subscription_count': count,
+        'average_subscription': round(total_monthly / count, 2) if count else 0
+    }
+    if unconverted:
+        data['unconverted_currencies'] = unconverted
+    response = jsonify(data)
+    # The version changes with every write, so unchanged dashboards get a 304
+    response.set_etag(f'analytics-{current_user.id}-{analytics.version}-{base_currency}-{fx_table().version}')
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+def compute_forecast(user_id, version, start, end, base_currency, fx_version):
+    """Forecast for one analytics version, memoised per app in create_app.
 
-@app.route('/api/catalog')
+    Any subscription write bumps the version, retiring old cache entries.
+    """
+    rows = db.session.execute(
+        select(Subscription.next_billing_date, Subscription.created_at, Subscription.billing_cycle,
+               Subscription.amount, Subscription.currency, Subscription.category)
+        .filter_by(user_id=user_id, is_active=True)
+    ).all()
+    # Without a known billing date, assume it renews on the day it was added
+    anchors = [next_billing or (created or datetime.utcnow()).date() for next_billing, created, *_ in rows]
+    # Currencies without a rate count as zero rather than turning every total into NaN
+    amounts = fx_table().convert(
+        [row.amount for row in rows], [normalize_currency(row.currency) for row in rows], base_currency, missing=0.0
+    )
+    result = forecast(
+        anchors,
+        [row.billing_cycle for row in rows],
+        amounts,
+        [row.category or 'other' for row in rows],
+        start, end
+    )
+    result['currency'] = base_currency
+    return result
+
+@bp.route('/api/forecast')
+@login_required
+def get_forecast():
+    """Future charges of active subscriptions; ?start=YYYY-MM-DD (default today) and ?days or ?end"""
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if 'start' in request.args else date.today()
+        if 'end' in request.args:
+            end = datetime.strptime(request.args['end'], '%Y-%m-%d').date()
+        else:
+            end = start + timedelta(days=int(request.args.get('days', 90)) - 1)
+    except ValueError:
+        return jsonify({'error': 'Invalid start, end or days'}), 400
+    if end < start or (end - start).days >= MAX_HORIZON_DAYS:
+        return jsonify({'error': f'Horizon must be between 1 and {MAX_HORIZON_DAYS} days'}), 400
+
+    analytics = get_user_analytics(current_user.id)
+    base_currency, fx_version = current_user.base_currency, fx_table().version
+
+    response = jsonify(service('forecast')(current_user.id, analytics.version, start, end, base_currency, fx_version))
+    response.set_etag(f'forecast-{current_user.id}-{analytics.version}-{start}-{end}-{base_currency}-{fx_version}')
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+@click.command('check-analytics')
+@click.option('--repair', is_flag=True, help='Rebuild totals that disagree with the subscriptions table.')
+@with_appcontext
+def check_analytics_command(repair):
+    """Compare stored analytics with a recomputation from subscriptions"""
+    mismatched = 0
+    def rounded(by_category):
+        return {(category, currency): (round(total, 2), n)
+                for category, per_currency in by_category.items() for currency, (total, n) in per_currency.items()}
+
+    for analytics in UserAnalytics.query.all():
+        count, by_category = compute_analytics(analytics.user_id)
+        stored = json.loads(analytics.by_category)
+        consistent = count == analytics.subscription_count and rounded(by_category) == rounded(stored)
+        if not consistent:
+            mismatched += 1
+            click.echo(f'user {analytics.user_id}: stored {analytics.subscription_count} subscription(s) '
+                       f'{rounded(stored)}, actual {count} {rounded(by_category)}')
+            if repair:
+                rebuild_analytics(analytics.user_id, analytics)
+
+    if repair:
+        db.session.commit()
+    click.echo(f'{mismatched} inconsistent user(s){" repaired" if repair and mismatched else ""}')
+
+@bp.route('/api/catalog')
 def get_catalog():
-    return jsonify([
-        {
-            'name': info['name'],
-            'category': info['category'],
-            'logo': info['logo'],
-            'suggested_price': {
-                'netflix': 15.99,
-                'spotify': 9.99,
-                'amazon prime': 14.99,
-                'disney': 13.99,
-                'chatgpt': 20.00,
-                'adobe': 54.99,
-                'microsoft': 9.99,
-                'dropbox': 11.99,
-                'apple': 9.99,
-                'google': 6.99
-            }.get(key, 9.99)
-        }
-        for key, info in SUBSCRIPTION_CATALOG.items()
-    ])
+    # ?q=<name or bank descriptor> resolves a single merchant
+    if request.args.get('q'):
+        match = match_catalog(request.args['q'])
+        return jsonify([match] if match else [])
+
+    return service('catalog_response').response()
+
+def create_app(config=None):
+    """Build the app from the environment; `config` overrides individual settings"""
+    app = Flask(__name__)
+    app.request_class = SpooledRequest
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('UPLOAD_MAX_MB', 16)) * 1024 * 1024
+    # Uploads stay in memory up to this size, then spill to an anonymous temp file (in UPLOAD_SPOOL_DIR if set)
+    app.config['UPLOAD_SPOOL_MAX_BYTES'] = int(os.getenv('UPLOAD_SPOOL_MAX_KB', 1024)) * 1024
+    app.config['UPLOAD_SPOOL_DIR'] = os.getenv('UPLOAD_SPOOL_DIR') or None
+    app.config['UPLOAD_WORKERS'] = int(os.getenv('UPLOAD_WORKERS', 4))
+    app.config['UPLOAD_QUEUE_DEPTH'] = int(os.getenv('UPLOAD_QUEUE_DEPTH', 32))
+    app.config['UPLOAD_BATCH_MAX_FILES'] = int(os.getenv('UPLOAD_BATCH_MAX_FILES', 24))
+    app.config['UPLOAD_BATCH_TIMEOUT'] = int(os.getenv('UPLOAD_BATCH_TIMEOUT', 600))
+    app.config['UPLOAD_STALE_MINUTES'] = int(os.getenv('UPLOAD_STALE_MINUTES', 30))
+    app.config['SUBSCRIPTIONS_MAX_PAGE_SIZE'] = 500
+    app.config['FAST_JSON'] = os.getenv('FAST_JSON', '1') == '1'
+    app.config['PDF_EXTRACT_WORKERS'] = int(os.getenv('PDF_EXTRACT_WORKERS', os.cpu_count() or 1))
+    # 'table' reads transaction rows from word positions (see layout.py); 'text' flattens each page
+    app.config['PDF_EXTRACT_MODE'] = os.getenv('PDF_EXTRACT_MODE', 'text')
+    app.config['RESULT_CACHE_PATH'] = os.getenv('RESULT_CACHE_PATH', os.path.join('cache', 'results.sqlite3'))
+    app.config['RESULT_CACHE_MAX_BYTES'] = int(os.getenv('RESULT_CACHE_MAX_MB', 256)) * 1024 * 1024
+    app.config['RESULT_CACHE_TTL'] = int(os.getenv('RESULT_CACHE_TTL', 7 * 24 * 3600))
+    # Logged-in users are cached per process; other workers see profile changes after at most the TTL
+    app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', 1024))
+    app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 30))
+    app.config.update(config or {})
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+
+    CORS(app, supports_credentials=True)
+
+    db.init_app(app)
+    with app.app_context():
+        # WAL, busy timeout and relaxed syncing for SQLite (see database.py); nothing connects yet
+        enable_sqlite_pragmas(db.engine)
+    migrate.init_app(app, db)
+    login_manager.init_app(app)
+
+    # The catalog only changes on deploy, so its body and ETag are built once
+    catalog_body = json.dumps(catalog_listing())
+    services = app.extensions['subscriptions'] = {
+        'catalog_response': PrecompressedBody(
+            catalog_body, 'application/json', sha256_digest(catalog_body)[:16], 'public, max-age=3600'
+        ),
+        'forecast': lru_cache(maxsize=1024)(compute_forecast),
+        # SQLite ignores FOR UPDATE, so saves from concurrent jobs are serialised here to keep analytics exact
+        'save_lock': threading.Lock(),
+        'user_cache': TTLCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL']),
+    }
+
+    app.register_blueprint(bp)
+    app.cli.add_command(check_analytics_command)
+
+    # Request timing and Prometheus metrics at /metrics
+    init_metrics(app)
 
-# Create tables
-with app.app_context():
-    db.create_all()
+    # Fingerprinted, precompressed static files (see build_assets.py)
+    init_assets(app)
+    return app
 
 if __name__ == '__main__':
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    app.run(debug=True, port=8080)
\ No newline at end of file
+    app = create_app()
+    # Bring the schema up to date; equivalent to `flask --app app_modern db upgrade`
+    with app.app_context():
+        upgrade()
+    app.run(debug=True, port=8080)
@@ -0,0 +1,78 @@
+"""Serve fingerprinted, precompressed static assets produced by build_assets.py."""
+import gzip
+import json
+import mimetypes
+import os
+
+from flask import Response, abort, request, send_file, url_for
+
+# Hashed files never change, so browsers and proxies may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def load_manifest(dist_dir):
+    try:
+        with open(os.path.join(dist_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class PrecompressedBody:
+    """A response body that never changes while the process runs, kept alongside its gzip form"""
+
+    def __init__(self, body, mimetype, etag, cache_control='no-cache'):
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.mimetype = mimetype
+        self.etag = etag
+        self.cache_control = cache_control
+
+    def response(self):
+        use_gzip = 'gzip' in request.accept_encodings
+        response = Response(self.gzipped if use_gzip else self.body, mimetype=self.mimetype)
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
+        response.set_etag(f"{self.etag}-gz" if use_gzip else self.etag)
+        response.headers['Cache-Control'] = self.cache_control
+        return response.make_conditional(request)
+
+
+def init_assets(app):
+    """Register /assets/<hashed path> and the asset_url() template helper"""
+    dist_dir = os.path.join(app.static_folder, 'dist')
+    manifest = load_manifest(dist_dir)
+    hashed_files = set(manifest.values())
+
+    @app.template_global()
+    def asset_url(path):
+        """URL of the fingerprinted copy of a static file, or the plain static URL if assets aren't built"""
+        hashed = manifest.get(path)
+        if hashed is None:
+            return url_for('static', filename=path)
+        return url_for('serve_asset', filename=hashed)
+
+    @app.route('/assets/<path:filename>')
+    def serve_asset(filename):
+        if filename not in hashed_files:
+            abort(404)
+
+        path = os.path.join(dist_dir, filename)
+        encoding = None
+        for name, suffix in ENCODINGS:
+            if name in request.accept_encodings and os.path.exists(path + suffix):
+                encoding = name
+                path += suffix
+                break
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_file(path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE, conditional=True)
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    return manifest
@@ -0,0 +1,84 @@
+"""Size of the text sent to the LLM with and without compaction, and whether detections survive it.
+
+Generates a seeded corpus with create_test_pdf.py (or reuses one written
+with --corpus) and extracts each statement once. The text then goes
+through llm.process_with_gemini twice, raw and compacted. The stub
+backend runs the rule-based detector on whatever it is sent, so
+precision and recall show any transaction lost to compaction. Token
+counts are compaction.estimate_tokens estimates, not a real tokenizer.
+
+Usage: python benchmarks/bench_compaction.py [--statements 6] [--pages 10] [--density 35] [--corpus DIR]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ['LLM_BACKEND'] = 'stub'
+os.environ.setdefault('LLM_STUB_LATENCY', '0')
+os.environ.setdefault('LLM_RATE_LIMIT', '0')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+
+def subscription_keys(subscriptions):
+    return {(s['name'].lower(), round(float(s['amount']), 2)) for s in subscriptions}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', help='existing corpus directory with ground_truth.json')
+    parser.add_argument('--statements', type=int, default=6)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--density', type=int, default=35)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    import compaction
+    import llm
+    from extraction import extract_text_from_pdf
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if not corpus:
+            from create_test_pdf import generate_corpus
+
+            corpus = tmp
+            generate_corpus(corpus, args.statements, args.seed, args.pages, args.density)
+        with open(os.path.join(corpus, 'ground_truth.json')) as f:
+            manifest = json.load(f)
+        texts = [extract_text_from_pdf(os.path.join(corpus, s['file']), 1) for s in manifest['statements']]
+
+    print(f"{'statement':<32} {'chars':>8} {'compact':>8} {'tokens':>8} {'compact':>8} {'ratio':>6} {'ms':>7}")
+    ratios = []
+    for statement, text in zip(manifest['statements'], texts):
+        start = time.perf_counter()
+        compacted = compaction.compact(text)
+        elapsed = time.perf_counter() - start
+        tokens, kept = compaction.estimate_tokens(text), compaction.estimate_tokens(compacted)
+        ratios.append(kept / tokens)
+        print(f"{statement['file']:<32} {len(text):8} {len(compacted):8} {tokens:8} {kept:8} "
+              f"{kept / tokens:6.2f} {elapsed * 1000:7.1f}")
+    print(f"median token ratio {statistics.median(ratios):.2f}\n")
+
+    print(f"{'input':<10} {'LLM calls':>9} {'precision':>9} {'recall':>7}")
+    for label, compact in [('raw', False), ('compacted', True)]:
+        calls = llm.client.backend.calls
+        hits = found = planted = 0
+        for statement, text in zip(manifest['statements'], texts):
+            predicted = subscription_keys(llm.process_with_gemini(text, compact=compact)['subscriptions'])
+            truth = subscription_keys(statement['subscriptions'])
+            hits += len(predicted & truth)
+            found += len(predicted)
+            planted += len(truth)
+        print(f"{label:<10} {llm.client.backend.calls - calls:9} {hits / found if found else 0:9.3f} "
+              f"{hits / planted if planted else 0:7.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""Extraction throughput, peak memory and detection accuracy over a synthetic statement corpus.
+
+Generates a seeded corpus with create_test_pdf.py (or reuses one written
+with --corpus), then runs every extraction backend in its own process so
+peak RSS is measured per backend. `output` is the memory held by the
+extracted results themselves. Each extractor's text is fed to every
+detection backend and scored against the planted subscriptions, including
+the one-off catalog look-alikes that must not be reported. `frequency` is
+the share of correct detections whose billing cycle is also right. The table
+extractor's rows go to the detectors as parsed transactions instead of text.
+
+    serial     pdfplumber, one page after another in this process
+    parallel   extraction.extract_text_from_pdf with the process pool
+    pypdf2     PyPDF2 only, the fallback path
+    table      layout.extract_transactions: rows from word positions, no page text
+
+    rules      detector.detect_subscriptions alone
+    analysis   analysis.analyze_statement with the stub LLM backend
+
+Usage: python benchmarks/bench_corpus.py [--statements 6] [--pages 60] [--density 35]
+       [--corpus DIR] [--extractors serial,parallel,pypdf2,table] [--detectors rules,analysis]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The stub answers instantly so detection timings measure the pipeline, not the network
+os.environ['LLM_BACKEND'] = 'stub'
+os.environ.setdefault('LLM_STUB_LATENCY', '0')
+os.environ.setdefault('LLM_RATE_LIMIT', '0')
+
+EXTRACTORS = ['serial', 'parallel', 'pypdf2', 'table']
+DETECTORS = ['rules', 'analysis']
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def extractor(name, workers):
+    import PyPDF2
+    import extraction
+
+    if name == 'serial':
+        return lambda path: '\f'.join(
+            text + '\n' for text in extraction.extract_page_range(path, 0, extraction.count_pages(path)) if text
+        )
+    if name == 'parallel':
+        return lambda path: extraction.extract_text_from_pdf(path, workers)
+    if name == 'pypdf2':
+        return lambda path: '\f'.join(
+            (page.extract_text() or '') + '\n' for page in PyPDF2.PdfReader(path).pages
+        )
+    if name == 'table':
+        from layout import extract_transactions
+        return lambda path: extract_transactions(path, workers)
+    raise SystemExit(f'unknown extractor {name!r}')
+
+
+def detector(name):
+    """A function from extracted text, or TransactionColumns from the table extractor, to detections"""
+    from layout import TransactionColumns
+
+    if name == 'rules':
+        from detector import detect_subscriptions, detect_in_transactions
+        return lambda extracted: (
+            detect_in_transactions(extracted.transactions()) if isinstance(extracted, TransactionColumns)
+            else detect_subscriptions(extracted)
+        ).subscriptions
+    if name == 'analysis':
+        from analysis import analyze_statement, analyze_transactions
+        return lambda extracted: (
+            analyze_transactions(extracted.transactions()) if isinstance(extracted, TransactionColumns)
+            else analyze_statement(extracted)
+        ).get('subscriptions', [])
+    raise SystemExit(f'unknown detector {name!r}')
+
+
+def subscription_keys(subscriptions):
+    """{(name, amount): frequency} for detected or planted subscriptions"""
+    return {(s['name'].lower(), round(float(s['amount']), 2)): s.get('frequency') for s in subscriptions}
+
+
+def output_kb(extracted):
+    """Memory held by one statement's extraction result: the text, or the row arrays"""
+    if isinstance(extracted, str):
+        return len(extracted.encode('utf-8')) / 1024
+    return (extracted.dates.nbytes + extracted.amounts.nbytes
+            + sum(len(d.encode('utf-8')) for d in extracted.descriptors)) / 1024
+
+
+def run_backend(corpus, extractor_name, detector_names, workers):
+    """Extract and score the whole corpus; runs in a fresh child process per extractor"""
+    # app_modern always loads NumPy, so load it before measuring for every backend alike
+    import numpy  # noqa: F401
+
+    with open(os.path.join(corpus, 'ground_truth.json')) as f:
+        manifest = json.load(f)
+
+    extract = extractor(extractor_name, workers)
+    outputs, pages = [], 0
+    start = time.perf_counter()
+    for statement in manifest['statements']:
+        outputs.append(extract(os.path.join(corpus, statement['file'])))
+        pages += statement['pages']
+    elapsed = time.perf_counter() - start
+
+    import extraction
+    # Join the pool so its processes count towards RUSAGE_CHILDREN
+    if extraction._pool is not None:
+        extraction._pool.shutdown(wait=True)
+    result = {
+        'extractor': extractor_name,
+        'pages': pages,
+        'seconds': elapsed,
+        'rss_mb': peak_rss_mb(),
+        'worker_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN),
+        'output_kb': sum(output_kb(extracted) for extracted in outputs),
+        'detectors': {}
+    }
+
+    for name in detector_names:
+        detect = detector(name)
+        hits = found = planted = right_frequency = 0
+        start = time.perf_counter()
+        for statement, extracted in zip(manifest['statements'], outputs):
+            predicted = subscription_keys(detect(extracted))
+            truth = subscription_keys(statement['subscriptions'])
+            matched = predicted.keys() & truth.keys()
+            hits += len(matched)
+            right_frequency += sum(predicted[key] == truth[key] for key in matched)
+            found += len(predicted)
+            planted += len(truth)
+        result['detectors'][name] = {
+            'seconds': time.perf_counter() - start,
+            'precision': hits / found if found else 0.0,
+            'recall': hits / planted if planted else 0.0,
+            # Share of correct detections that also got the billing cycle right
+            'frequency': right_frequency / hits if hits else 0.0
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', help='existing corpus directory with ground_truth.json')
+    parser.add_argument('--statements', type=int, default=6)
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--density', type=int, default=35)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--extractors', default=','.join(EXTRACTORS))
+    parser.add_argument('--detectors', default=','.join(DETECTORS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_backend(args.corpus, args.child, args.detectors.split(','), args.workers)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if not corpus:
+            from create_test_pdf import generate_corpus
+
+            corpus = tmp
+            generate_corpus(corpus, args.statements, args.seed, args.pages, args.density)
+
+        results = []
+        for name in args.extractors.split(','):
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', name, '--corpus', corpus,
+                 '--detectors', args.detectors, '--workers', str(args.workers)],
+                capture_output=True, text=True, check=True
+            )
+            results.append(json.loads(child.stdout.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'extractor':<10} {'pages/s':>9} {'peak RSS':>10} {'workers RSS':>12} {'output':>9}   "
+          f"{'detector':<9} {'precision':>9} {'recall':>7} {'frequency':>9} {'seconds':>8}")
+    for result in results:
+        lead = (f"{result['extractor']:<10} {result['pages'] / result['seconds']:9.1f} "
+                f"{result['rss_mb']:8.1f}MB {result['worker_rss_mb']:10.1f}MB {result['output_kb']:7.0f}KB")
+        for name, scores in result['detectors'].items():
+            print(f"{lead}   {name:<9} {scores['precision']:9.3f} {scores['recall']:7.3f} "
+                  f"{scores['frequency']:9.3f} {scores['seconds']:8.3f}")
+            lead = ' ' * len(lead)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+"""Latency and throughput of every app_modern endpoint under load.
+
+Seeds a scratch SQLite database with --users users holding --subscriptions
+subscriptions each, swaps Gemini for the offline stub backend (so uploads
+exercise the whole pipeline without network calls), then drives each
+endpoint with --requests requests from --concurrency threads, either
+in-process through the Flask test client or over real HTTP against a
+threaded server on localhost.
+
+Reports p50/p95/p99 latency, throughput and status codes per endpoint.
+Uploads are also polled until their job is done or failed, and reported a
+second time end to end, from the request to the job's outcome.
+--json saves the numbers; --baseline compares against a saved run and
+exits non-zero when any p95 regresses by more than --tolerance.
+
+Usage: python benchmarks/bench_endpoints.py [--mode client|http] [--users 50] [--subscriptions 200]
+                                            [--requests 500] [--concurrency 8] [--json out.json]
+                                            [--baseline previous.json] [--tolerance 0.25]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp.name, 'endpoints.db')}"
+os.environ['RESULT_CACHE_PATH'] = os.path.join(_tmp.name, 'results.sqlite3')
+os.environ['LLM_BACKEND'] = 'stub'
+os.environ.setdefault('LLM_STUB_LATENCY', '0.05')
+os.environ.setdefault('LLM_RATE_LIMIT', '0')
+os.environ.setdefault('UPLOAD_QUEUE_DEPTH', '1000')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')  # one log line per request would swamp the report
+
+# Seconds between status polls of an upload job, and how long to wait for its outcome
+POLL_INTERVAL = 0.02
+POLL_TIMEOUT = 300
+
+from werkzeug.serving import make_server
+
+from app_modern import create_app, db, User, Subscription, rebuild_analytics
+from create_test_pdf import LAYOUTS, draw_statement, plan_statement
+
+app = create_app()
+
+CATEGORIES = ['streaming', 'software', 'storage', 'other']
+CYCLES = ['monthly', 'monthly', 'yearly', 'weekly']
+CURRENCIES = ['USD', 'USD', 'EUR', 'GBP']
+
+
+def seed(users, per_user, rng):
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(User(email=f'user{i}@example.com') for i in range(users))
+        db.session.commit()
+        user_ids = [u.id for u in User.query.order_by(User.id)]
+        for user_id in user_ids:
+            db.session.add_all(Subscription(
+                user_id=user_id,
+                name=f'Service {i}',
+                amount=round(rng.uniform(1, 60), 2),
+                currency=rng.choice(CURRENCIES),
+                billing_cycle=rng.choice(CYCLES),
+                category=rng.choice(CATEGORIES),
+                next_billing_date=date.today() + timedelta(days=rng.randint(0, 365)),
+                logo_url='💳',
+                detected_from='manual'
+            ) for i in range(per_user))
+            rebuild_analytics(user_id)
+        db.session.commit()
+        return user_ids
+
+
+def statement_pdf(variant):
+    """A one-page generated statement; each `variant` has different content so uploads miss the result cache"""
+    transactions, _ = plan_statement(random.Random(variant), pages=1, density=20)
+    buffer = io.BytesIO()
+    draw_statement(buffer, transactions, layout=list(LAYOUTS)[variant % len(LAYOUTS)], density=20)
+    return buffer.getvalue()
+
+
+class Scenario:
+    def __init__(self, name, method, path, build=None, on_success=None, restore=False, poll=None):
+        self.name = name
+        self.method = method
+        self.path = path  # a string, or callable(user_id, i) -> path
+        self.build = build  # callable(user_id, i) -> request kwargs
+        self.on_success = on_success  # callable(user_id, response json)
+        self.restore = restore  # hand the row id back to the pool after a successful request
+        self.poll = poll  # callable(response json) -> status path of a job to wait for after a 202
+
+    def request(self, user_id, i):
+        path = self.path(user_id, i) if callable(self.path) else self.path
+        return self.method, path, self.build(user_id, i) if self.build else {}
+
+
+def scenarios(rng, pdfs):
+    # Subscription ids per user; updates borrow one at a time and deletes consume them,
+    # so no two requests touch the same row at once
+    with app.app_context():
+        created = {}
+        for sub_id, user_id in db.session.query(Subscription.id, Subscription.user_id):
+            created.setdefault(user_id, []).append(sub_id)
+    created_lock = threading.Lock()
+
+    def remember(user_id, response_json):
+        with created_lock:
+            created.setdefault(user_id, []).append(response_json['id'])
+
+    def take(user_id):
+        with created_lock:
+            ids = created.get(user_id) or []
+            return ids.pop() if ids else 0
+
+    return [
+        Scenario('GET /api/catalog', 'GET', '/api/catalog'),
+        Scenario('GET /api/analytics', 'GET', '/api/analytics'),
+        Scenario('GET /api/subscriptions (all)', 'GET', '/api/subscriptions'),
+        Scenario('GET /api/subscriptions?limit=50', 'GET', '/api/subscriptions?limit=50&sort=-amount'),
+        Scenario('GET /api/forecast?days=365', 'GET', '/api/forecast?days=365'),
+        Scenario('POST /api/subscriptions', 'POST', '/api/subscriptions',
+                 build=lambda u, i: {'json': {'name': f'Bench Service {i}', 'amount': round(rng.uniform(1, 30), 2)}},
+                 on_success=remember),
+        Scenario('PUT /api/subscriptions/<id>', 'PUT', lambda u, i: f'/api/subscriptions/{take(u)}',
+                 build=lambda u, i: {'json': {'amount': round(rng.uniform(1, 30), 2)}}, restore=True),
+        Scenario('DELETE /api/subscriptions/<id>', 'DELETE', lambda u, i: f'/api/subscriptions/{take(u)}'),
+        Scenario('POST /api/upload', 'POST', '/api/upload',
+                 build=lambda u, i: {'files': pdfs[i % len(pdfs)]},
+                 poll=lambda body: f"/api/upload/{body['job_id']}"),
+    ], remember
+
+
+class ClientTransport:
+    """In-process requests through one Flask test client per thread"""
+
+    def __init__(self, user_ids):
+        self.user_ids = user_ids
+        self._local = threading.local()
+
+    def _client(self, user_id):
+        clients = getattr(self._local, 'clients', None)
+        if clients is None:
+            clients = self._local.clients = {}
+        if user_id not in clients:
+            client = app.test_client()
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user_id)
+            clients[user_id] = client
+        return clients[user_id]
+
+    def send(self, user_id, method, path, kwargs):
+        if 'files' in kwargs:
+            kwargs = {'data': {'file': (io.BytesIO(kwargs['files']), 'statement.pdf')}}
+        response = self._client(user_id).open(path, method=method, **kwargs)
+        body = response.get_json(silent=True)
+        response.close()
+        return response.status_code, body
+
+
+class HTTPTransport:
+    """Real HTTP against a threaded Werkzeug server, with a signed session cookie per user"""
+
+    def __init__(self, user_ids):
+        import requests
+
+        self.requests = requests
+        # One access-log line per request would dominate the timings
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.base = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        serializer = app.session_interface.get_signing_serializer(app)
+        self.cookies = {u: serializer.dumps({'_user_id': str(u), '_fresh': True}) for u in user_ids}
+        self._local = threading.local()
+
+    def _session(self, user_id):
+        # One keep-alive session per thread and user, so cookies the app sets stay with their user
+        sessions = getattr(self._local, 'sessions', None)
+        if sessions is None:
+            sessions = self._local.sessions = {}
+        if user_id not in sessions:
+            session = self.requests.Session()
+            session.cookies.set(app.config['SESSION_COOKIE_NAME'], self.cookies[user_id])
+            sessions[user_id] = session
+        return sessions[user_id]
+
+    def send(self, user_id, method, path, kwargs):
+        if 'files' in kwargs:
+            kwargs = {'files': {'file': ('statement.pdf', kwargs['files'], 'application/pdf')}}
+        response = self._session(user_id).request(method, self.base + path, timeout=30, **kwargs)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+    def close(self):
+        self.server.shutdown()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def wait_for_job(transport, user_id, path):
+    """Poll a job's status until it is done or failed; its final status, or 'timeout'"""
+    deadline = time.perf_counter() + POLL_TIMEOUT
+    while time.perf_counter() < deadline:
+        status, body = transport.send(user_id, 'GET', path, {})
+        if status != 200 or body['status'] in ('done', 'failed'):
+            return body['status'] if status == 200 else str(status)
+        time.sleep(POLL_INTERVAL)
+    return 'timeout'
+
+
+def summarize(latencies, statuses, requests, wall):
+    latencies = sorted(latencies)
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        'throughput_rps': round(len(latencies) / wall, 1),
+        'status': dict(Counter(statuses))
+    }
+
+
+def run(scenario, transport, user_ids, requests, concurrency, rng, on_success):
+    """Send `requests` requests for one scenario from `concurrency` threads.
+
+    Returns the request timings, and for polled scenarios the timings to each job's outcome (else None).
+    """
+    plan = [(rng.choice(user_ids), i) for i in range(requests)]
+
+    def one(item):
+        user_id, i = item
+        method, path, kwargs = scenario.request(user_id, i)
+        start = time.perf_counter()
+        status, body = transport.send(user_id, method, path, kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        if scenario.on_success and 200 <= status < 300 and body:
+            scenario.on_success(user_id, body)
+        # Updated rows go back to the pool so later updates and deletes have something to work on
+        if scenario.restore and 200 <= status < 300:
+            on_success(user_id, {'id': int(path.rsplit('/', 1)[1])})
+        job = (user_id, scenario.poll(body), start) if scenario.poll and status == 202 else None
+        return elapsed, status, job
+
+    def finish(job):
+        user_id, path, started = job
+        outcome = wait_for_job(transport, user_id, path)
+        return (time.perf_counter() - started) * 1000, outcome
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, plan))
+        wall = time.perf_counter() - start
+        # Jobs are polled once everything is queued, so the request timings above are not held up
+        jobs = list(pool.map(finish, [r[2] for r in results if r[2]]))
+    total = time.perf_counter() - start
+
+    result = summarize([r[0] for r in results], [str(r[1]) for r in results], requests, wall)
+    if not scenario.poll:
+        return result, None
+    return result, summarize([j[0] for j in jobs], [j[1] for j in jobs], len(jobs), total)
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = json.load(f)['endpoints']
+
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous and previous['p95_ms'] > 0 and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=['client', 'http'], default='client')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--subscriptions', type=int, default=200, help='per user')
+    parser.add_argument('--requests', type=int, default=500, help='per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--only', help='run endpoints whose name contains this text')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--baseline', help='results file from an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 growth over the baseline')
+    args = parser.parse_args()
+
+    rng = random.Random(18)
+    start = time.perf_counter()
+    user_ids = seed(args.users, args.subscriptions, rng)
+    print(f"Seeded {args.users} users x {args.subscriptions} subscriptions in {time.perf_counter() - start:.1f}s; "
+          f"mode={args.mode}, concurrency={args.concurrency}, stub LLM latency {os.environ['LLM_STUB_LATENCY']}s\n")
+
+    pdfs = [statement_pdf(i) for i in range(20)]
+    transport = HTTPTransport(user_ids) if args.mode == 'http' else ClientTransport(user_ids)
+    cases, remember = scenarios(rng, pdfs)
+
+    results = {}
+    print(f"{'endpoint':<36} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}  status")
+    try:
+        for scenario in cases:
+            if args.only and args.only not in scenario.name:
+                continue
+            result, jobs = run(scenario, transport, user_ids, args.requests, args.concurrency, rng, remember)
+            rows = [(scenario.name, result)]
+            if jobs is not None:
+                # Request to job outcome; req/s is jobs finished per second of the whole run
+                rows.append((f'{scenario.name} (end to end)', jobs))
+            for name, row in rows:
+                results[name] = row
+                status = ' '.join(f'{code}x{count}' for code, count in sorted(row['status'].items()))
+                print(f"{name:<36} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['p99_ms']:8.2f} "
+                      f"{row['throughput_rps']:8.1f}  {status}")
+    finally:
+        if args.mode == 'http':
+            transport.close()
+        # Jobs still running when the interpreter exits would fail as their thread pools shut down
+        upload_queue = app.extensions['subscriptions'].get('upload_queue')
+        if upload_queue is not None:
+            upload_queue.shutdown(wait=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'endpoints': results}, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print('\nRegressions against ' + args.baseline + ':\n  ' + '\n  '.join(regressions))
+            sys.exit(1)
+        print(f'\nNo p95 regressions beyond {args.tolerance:.0%} against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Compare the old serial pdfplumber loop with the page-parallel extractor.
+
+Usage: python benchmarks/bench_extraction.py [--pages 60] [--workers 1,2,4]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdfplumber
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from extraction import extract_text_from_pdf
+
+MERCHANTS = ['NETFLIX.COM', 'SPOTIFY PREMIUM', 'Grocery Store Purchase', 'Gas Station',
+             'Restaurant XYZ', 'ADOBE CREATIVE CLOUD', 'Utility Bill - Electric', 'Coffee Shop']
+
+
+def build_statement(path, pages, rows_per_page=35, seed=42):
+    rng = random.Random(seed)
+    c = canvas.Canvas(path, pagesize=letter)
+    width, height = letter
+    for page in range(pages):
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(50, height - 50, f"Bank of Example - Statement page {page + 1}")
+        c.setFont("Helvetica", 10)
+        y_position = height - 80
+        for _ in range(rows_per_page):
+            c.drawString(50, y_position, f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}")
+            c.drawString(150, y_position, rng.choice(MERCHANTS))
+            c.drawString(400, y_position, f"-{rng.uniform(1, 200):.2f}")
+            y_position -= 18
+        c.showPage()
+    c.save()
+
+
+def serial_baseline(pdf_path):
+    """The extraction loop both apps used before the parallel extractor, with its form feeds between pages"""
+    pages = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text()
+            if page_text:
+                pages.append(page_text + "\n")
+    return '\f'.join(pages)
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--workers', default=f'1,2,4,{os.cpu_count()}')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, 'statement.pdf')
+        build_statement(pdf_path, args.pages)
+
+        elapsed, expected = timed(serial_baseline, pdf_path, repeat=args.repeat)
+        print(f"{'serial baseline':<20} {elapsed:8.3f}s  {args.pages / elapsed:8.1f} pages/s")
+
+        for workers in sorted({int(w) for w in args.workers.split(',')}):
+            # Warm the pool so process start-up is not counted against the first run
+            extract_text_from_pdf(pdf_path, workers)
+            elapsed, text = timed(extract_text_from_pdf, pdf_path, workers, repeat=args.repeat)
+            status = 'ok' if text == expected else 'MISMATCH'
+            print(f"{f'parallel x{workers}':<20} {elapsed:8.3f}s  {args.pages / elapsed:8.1f} pages/s  {status}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Check that the hot subscription queries use their indexes at scale.
+
+Builds a scratch SQLite database from the models (which `flask db check`
+keeps identical to the migrations), seeds it with
+--rows subscriptions spread over --users users, then runs EXPLAIN QUERY
+PLAN for each access path and times it. Exits non-zero if any query
+falls back to a table scan or picks the wrong index.
+
+Usage: python benchmarks/bench_query_plans.py [--rows 1000000] [--users 10000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select
+
+from app_modern import db, Subscription, StatementUpload
+
+
+def seed(path, rows, users, seed=7):
+    rng = random.Random(seed)
+    categories = ['streaming', 'software', 'storage', 'various', 'other']
+    cycles = ['monthly', 'monthly', 'monthly', 'yearly', 'weekly']
+    today = date.today()
+    now = datetime.utcnow().isoformat(sep=' ')
+
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.executemany('INSERT INTO user (id, email) VALUES (?, ?)',
+                     ((i, f'user{i}@example.com') for i in range(1, users + 1)))
+    conn.executemany(
+        'INSERT INTO subscription (user_id, name, name_key, amount, currency, billing_cycle, category, '
+        'next_billing_date, is_active, created_at, updated_at, detected_from, confidence) '
+        "VALUES (?, ?, ?, ?, 'USD', ?, ?, ?, ?, ?, ?, 'manual', 1.0)",
+        (
+            (i % users + 1, f'Service {i}', f'service {i}', round(rng.uniform(1, 60), 2),
+             rng.choice(cycles), rng.choice(categories),
+             (today + timedelta(days=rng.randint(-30, 365))).isoformat(),
+             rng.random() < 0.8, now, now)
+            for i in range(rows)
+        )
+    )
+    conn.executemany(
+        'INSERT INTO statement_upload (user_id, filename, uploaded_at, processed, status) '
+        "VALUES (?, 'statement.pdf', ?, 1, 'done')",
+        ((i % users + 1, now) for i in range(rows // 10))
+    )
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+
+
+def compile_sql(statement, engine):
+    return str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=10_000)
+    args = parser.parse_args()
+
+    user_id = args.users // 2
+    today = date.today()
+    # (description, query, index that must appear in the plan)
+    checks = [
+        ('list subscriptions', select(Subscription).where(Subscription.user_id == user_id), None),
+        ('analytics (active only)',
+         select(Subscription).where(Subscription.user_id == user_id, Subscription.is_active.is_(True)),
+         'ix_subscription_user_active'),
+        ('upcoming renewals for user',
+         select(Subscription).where(Subscription.user_id == user_id,
+                                    Subscription.next_billing_date.between(today, today + timedelta(days=7))),
+         'ix_subscription_user_next_billing'),
+        ('renewals due tomorrow, all users',
+         select(Subscription.id).where(Subscription.next_billing_date == today + timedelta(days=1)),
+         'ix_subscription_next_billing_date'),
+        ('recent uploads for user',
+         select(StatementUpload).where(StatementUpload.user_id == user_id)
+         .order_by(StatementUpload.uploaded_at.desc()).limit(20),
+         'ix_statement_upload_user_uploaded'),
+    ]
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'plans.db')
+        engine = create_engine(f'sqlite:///{path}')
+        db.metadata.create_all(engine)
+
+        start = time.perf_counter()
+        seed(path, args.rows, args.users)
+        print(f"Seeded {args.rows:,} subscriptions for {args.users:,} users in {time.perf_counter() - start:.1f}s\n")
+
+        conn = sqlite3.connect(path)
+        for description, statement, expected_index in checks:
+            sql = compile_sql(statement, engine)
+            plan = ' / '.join(row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}'))
+
+            start = time.perf_counter()
+            count = len(conn.execute(sql).fetchall())
+            elapsed = (time.perf_counter() - start) * 1000
+
+            uses_index = 'INDEX' in plan and not plan.startswith('SCAN')
+            ok = uses_index and (expected_index is None or expected_index in plan)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {description:<34} {elapsed:8.2f} ms  {count:6d} rows  {plan}")
+        conn.close()
+        engine.dispose()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
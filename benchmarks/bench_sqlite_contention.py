@@ -0,0 +1,151 @@
+"""Write throughput on one SQLite file with N worker processes, with and without the connection pragmas.
+
+Each worker process imports app_modern, as a separate gunicorn worker
+would, and loops over the dashboard's write path for its own user:
+create a subscription, list, update it, read analytics, delete it. Each
+write also updates the analytics row. Two configurations are compared
+on a fresh database:
+
+    default    rollback journal, synchronous=FULL, the driver's 5s lock timeout
+    tuned      database.py defaults: WAL, synchronous=NORMAL, 15s busy_timeout
+
+Lock errors are requests that failed with "database is locked" (HTTP 500).
+
+Usage: python benchmarks/bench_sqlite_contention.py [--writers 1,2,4,8] [--seconds 5] [--configs default,tuned]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CONFIGS = {
+    'default': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_BUSY_TIMEOUT_MS': '5000',
+                'SQLITE_CACHE_SIZE': '', 'SQLITE_TEMP_STORE': ''},
+    'tuned': {},
+}
+PRAGMA_VARS = ['SQLITE_JOURNAL_MODE', 'SQLITE_SYNCHRONOUS', 'SQLITE_BUSY_TIMEOUT_MS', 'SQLITE_CACHE_SIZE',
+               'SQLITE_TEMP_STORE']
+
+
+def setup_database(users):
+    from app_modern import create_app, db, User
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(User(email=f'writer{i}@example.com') for i in range(users))
+        db.session.commit()
+
+
+def worker(user_id, ready, start, deadline, results):
+    from app_modern import create_app
+
+    app = create_app()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    writes = reads = errors = 0
+    latencies = []
+
+    def call(method, path, **kwargs):
+        nonlocal errors
+        began = time.perf_counter()
+        response = None
+        try:
+            response = client.open(path, method=method, **kwargs)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        if not ok:
+            errors += 1
+        return ok, time.perf_counter() - began, response if ok else None
+
+    ready.put(user_id)
+    start.wait()
+    i = 0
+    while time.time() < deadline.value:
+        ok, elapsed, response = call('POST', '/api/subscriptions', json={
+            'name': f'Service {user_id}-{i}', 'amount': 9.99, 'billing_cycle': 'monthly', 'category': 'other'})
+        i += 1
+        if not ok:
+            continue
+        writes += 1
+        latencies.append(elapsed)
+        subscription_id = response.get_json()['id']
+
+        ok, _, _ = call('GET', '/api/subscriptions?limit=50')
+        reads += ok
+        ok, elapsed, _ = call('PUT', f'/api/subscriptions/{subscription_id}', json={'amount': 12.49})
+        writes += ok
+        latencies += [elapsed] if ok else []
+        ok, _, _ = call('GET', '/api/analytics')
+        reads += ok
+        ok, elapsed, _ = call('DELETE', f'/api/subscriptions/{subscription_id}')
+        writes += ok
+        latencies += [elapsed] if ok else []
+
+    results.put((writes, reads, errors, latencies))
+
+
+def run(config, writers, seconds):
+    ctx = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'contention.db')}"
+        os.environ['RESULT_CACHE_PATH'] = os.path.join(tmp, 'results.sqlite3')
+        for name in PRAGMA_VARS:
+            os.environ.pop(name, None)
+        os.environ.update(CONFIGS[config])
+
+        setup = ctx.Process(target=setup_database, args=(writers,))
+        setup.start()
+        setup.join()
+
+        ready, results, start = ctx.Queue(), ctx.Queue(), ctx.Event()
+        deadline = ctx.Value('d', 0.0)
+        processes = [ctx.Process(target=worker, args=(user_id, ready, start, deadline, results))
+                     for user_id in range(1, writers + 1)]
+        for process in processes:
+            process.start()
+        # Wait until every worker has imported the app so start-up is not timed
+        for _ in processes:
+            ready.get()
+        deadline.value = time.time() + seconds
+        start.set()
+
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    writes = sum(r[0] for r in collected)
+    reads = sum(r[1] for r in collected)
+    errors = sum(r[2] for r in collected)
+    latencies = sorted(latency for r in collected for latency in r[3])
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else float('nan')
+    return writes / seconds, reads / seconds, errors, p95
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', default='1,2,4,8')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--configs', default=','.join(CONFIGS))
+    args = parser.parse_args()
+
+    os.environ['LLM_BACKEND'] = 'stub'
+    os.environ['LOG_LEVEL'] = 'WARNING'
+
+    print(f"{'config':<8} {'writers':>7} {'writes/s':>9} {'reads/s':>8} {'lock errors':>11} {'p95 write ms':>12}")
+    for writers in [int(w) for w in args.writers.split(',')]:
+        for config in args.configs.split(','):
+            writes, reads, errors, p95 = run(config, writers, args.seconds)
+            print(f"{config:<8} {writers:>7} {writes:9.1f} {reads:8.1f} {errors:>11} {p95:12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Worker start-up cost: importing app_modern, building the app and serving the first request.
+
+Every sample is a fresh interpreter, as a newly forked or spawned worker
+would be. The `eager` variant also imports the PDF, LLM and OAuth stacks
+up front, as app_modern did before they were loaded lazily. That includes
+google.generativeai, which the default Gemini backend loads; the stub
+backend answers the uploads either way. With lazy loading the first
+upload pays for these imports instead, which --upload shows separately.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--variants lazy,eager] [--upload]
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+HEAVY_MODULES = ['extraction', 'analysis', 'google.generativeai', 'authlib.integrations.flask_client']
+
+
+def measure(variant, upload):
+    """Runs in the child interpreter and returns timings in seconds"""
+    import importlib
+
+    timings = {}
+    start = time.perf_counter()
+    if variant == 'eager':
+        for name in HEAVY_MODULES:
+            importlib.import_module(name)
+    from app_modern import create_app, db, User
+    timings['import'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app = create_app()
+    timings['create_app'] = time.perf_counter() - start
+
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(email='startup@example.com'))
+        db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+
+    start = time.perf_counter()
+    client.get('/api/analytics')
+    timings['first_request'] = time.perf_counter() - start
+    timings['rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    if upload:
+        import io
+        import random
+
+        from create_test_pdf import draw_statement, plan_statement
+
+        transactions, _ = plan_statement(random.Random(1), pages=1)
+        pdf = io.BytesIO()
+        draw_statement(pdf, transactions)
+        start = time.perf_counter()
+        job = client.post('/api/upload', data={'file': (io.BytesIO(pdf.getvalue()), 'statement.pdf')}).get_json()
+        while client.get(f"/api/upload/{job['job_id']}").get_json()['status'] in ('queued', 'processing'):
+            time.sleep(0.01)
+        timings['first_upload'] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--variants', default='lazy,eager')
+    parser.add_argument('--upload', action='store_true', help='also time the first upload in each worker')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.upload)))
+        return
+
+    env = dict(os.environ, LLM_BACKEND='stub', LLM_STUB_LATENCY='0', LOG_LEVEL='WARNING')
+    columns = ['import', 'create_app', 'first_request'] + (['first_upload'] if args.upload else [])
+    print(f"{'variant':<8} " + ' '.join(f'{c + " ms":>16}' for c in columns) + f" {'total ms':>10} {'peak RSS':>9}")
+
+    for variant in args.variants.split(','):
+        samples = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as tmp:
+                env['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+                env['RESULT_CACHE_PATH'] = os.path.join(tmp, 'results.sqlite3')
+                child = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--child', variant] + (['--upload'] if args.upload else []),
+                    env=env, capture_output=True, text=True, check=True
+                )
+            samples.append(json.loads(child.stdout.strip().splitlines()[-1]))
+
+        medians = {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+        startup = medians['import'] + medians['create_app'] + medians['first_request']
+        print(f"{variant:<8} " + ' '.join(f"{medians[c] * 1000:16.1f}" for c in columns)
+              + f" {startup * 1000:10.1f} {medians['rss_mb']:7.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
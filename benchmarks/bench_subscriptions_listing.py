@@ -0,0 +1,114 @@
+"""Payload size and latency of GET /api/subscriptions variants.
+
+Seeds one user with --rows subscriptions in a scratch SQLite database and
+compares the original ORM + jsonify listing with the paginated, projected
+and (if orjson is installed) fast-JSON paths.
+
+Usage: python benchmarks/bench_subscriptions_listing.py [--rows 2000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmp.name, 'listing.db')}"
+
+from flask import jsonify
+from flask_login import current_user, login_required
+
+import app_modern
+from app_modern import create_app, db, User, Subscription
+
+app = create_app()
+
+
+@app.route('/bench/legacy-subscriptions')
+@login_required
+def legacy_subscriptions():
+    """The listing as it was before pagination and projection"""
+    subscriptions = Subscription.query.filter_by(user_id=current_user.id).all()
+    return jsonify([{
+        'id': sub.id,
+        'name': sub.name,
+        'amount': sub.amount,
+        'currency': sub.currency,
+        'billing_cycle': sub.billing_cycle,
+        'category': sub.category,
+        'next_billing_date': sub.next_billing_date.isoformat() if sub.next_billing_date else None,
+        'is_active': sub.is_active,
+        'logo_url': sub.logo_url,
+        'detected_from': sub.detected_from,
+        'confidence': sub.confidence
+    } for sub in subscriptions])
+
+
+def seed(rows):
+    rng = random.Random(3)
+    with app.app_context():
+        db.create_all()
+        user = User(email='power-user@example.com')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add_all(Subscription(
+            user_id=user.id,
+            name=f'Service {i}',
+            amount=round(rng.uniform(1, 60), 2),
+            billing_cycle=rng.choice(['monthly', 'yearly', 'weekly']),
+            category=rng.choice(['streaming', 'software', 'storage', 'other']),
+            next_billing_date=date.today() + timedelta(days=rng.randint(0, 365)),
+            logo_url='💳',
+            detected_from='manual'
+        ) for i in range(rows))
+        db.session.commit()
+        return user.id
+
+
+def measure(client, url, query, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, query_string=query)
+        timings.append((time.perf_counter() - start) * 1000)
+        size = len(response.data)
+        assert response.status_code == 200, response.data
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    user_id = seed(args.rows)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+
+    cases = [
+        ('legacy (ORM + jsonify)', '/bench/legacy-subscriptions', {}, {'FAST_JSON': False}),
+        ('full listing', '/api/subscriptions', {}, {'FAST_JSON': False}),
+        ('full listing, fast JSON', '/api/subscriptions', {}, {'FAST_JSON': True}),
+        ('page of 50', '/api/subscriptions', {'limit': 50}, {'FAST_JSON': True}),
+        ('page of 50, fields=name,amount', '/api/subscriptions', {'limit': 50, 'fields': 'name,amount'}, {'FAST_JSON': True}),
+        ('due in 7 days', '/api/subscriptions', {'billing_within': 7}, {'FAST_JSON': True}),
+    ]
+
+    print(f"{args.rows} subscriptions, orjson {'available' if app_modern.orjson else 'not installed'}\n")
+    print(f"{'case':<34} {'median ms':>10} {'bytes':>10}")
+    for name, url, query, config in cases:
+        app.config.update(config)
+        latency, size = measure(client, url, query, args.repeat)
+        print(f"{name:<34} {latency:10.2f} {size:10d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Fingerprint and precompress everything under static/ into static/dist/.
+
+Each file is copied to a content-hashed name (js/app.js -> js/app.<hash>.js)
+alongside .gz and, when the brotli package is installed, .br variants.
+static/dist/manifest.json maps original paths to hashed ones; the app's
+asset_url() helper reads it so templates point at the immutable copies.
+
+Run before deploying: python build_assets.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST = os.path.join(DIST_DIR, 'manifest.json')
+
+# Already-compressed formats gain nothing from another pass
+COMPRESSIBLE = {'.js', '.css', '.html', '.svg', '.json', '.txt', '.map', '.xml', '.ico'}
+
+
+def fingerprint(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    return hashlib.sha256(data).hexdigest()[:12], data
+
+
+def build():
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(STATIC_DIR):
+        if os.path.abspath(dirpath).startswith(DIST_DIR):
+            continue
+        for filename in filenames:
+            source = os.path.join(dirpath, filename)
+            relative = os.path.relpath(source, STATIC_DIR).replace(os.sep, '/')
+            digest, data = fingerprint(source)
+
+            stem, ext = os.path.splitext(relative)
+            hashed = f'{stem}.{digest}{ext}'
+            target = os.path.join(DIST_DIR, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+
+            sizes = [f'{len(data)} B']
+            if ext.lower() in COMPRESSIBLE:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                with open(target + '.gz', 'wb') as f:
+                    f.write(compressed)
+                sizes.append(f'gzip {len(compressed)} B')
+                if brotli is not None:
+                    compressed = brotli.compress(data, quality=11)
+                    with open(target + '.br', 'wb') as f:
+                        f.write(compressed)
+                    sizes.append(f'br {len(compressed)} B')
+
+            manifest[relative] = hashed
+            print(f"{relative} -> dist/{hashed} ({', '.join(sizes)})")
+
+    with open(MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"Wrote {len(manifest)} assets to {os.path.relpath(DIST_DIR, ROOT)}")
+
+
+if __name__ == "__main__":
+    build()
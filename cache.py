@@ -0,0 +1,166 @@
+"""Content-addressed SQLite cache for extraction and analysis results, and a small in-process TTL cache."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_PATH = os.getenv('RESULT_CACHE_PATH', os.path.join('cache', 'results.sqlite3'))
+DEFAULT_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_MB', 256)) * 1024 * 1024
+DEFAULT_TTL = int(os.getenv('RESULT_CACHE_TTL', 7 * 24 * 3600))
+
+
+def sha256_digest(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def pdf_key(pdf_bytes, extraction_version):
+    """Key for the text extracted from an uploaded PDF"""
+    return 'pdf-text:' + sha256_digest(extraction_version, pdf_bytes)
+
+
+def table_key(pdf_bytes, layout_version):
+    """Key for the transaction rows read from an uploaded PDF's layout"""
+    return 'pdf-table:' + sha256_digest(layout_version, pdf_bytes)
+
+
+def analysis_key(text, prompt_version):
+    """Key for the parsed analysis of some statement text under a given prompt"""
+    return 'analysis:' + sha256_digest(prompt_version, text)
+
+
+class ResultCache:
+    """JSON values in SQLite with a TTL and least-recently-used eviction by total size"""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_entries_accessed_at ON entries (accessed_at)')
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connection()
+        row = conn.execute('SELECT value, created_at FROM entries WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+
+        if row is None or now - row[1] > self.ttl:
+            if row is not None:
+                conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self.misses += 1
+            return None
+
+        conn.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        payload = json.dumps(value)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+            (key, payload, size, now, now)
+        )
+        self._evict(now)
+
+    def _evict(self, now):
+        conn = self._connection()
+        conn.execute('DELETE FROM entries WHERE created_at < ?', (now - self.ttl,))
+
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until we are back under budget
+        excess = total - self.max_bytes
+        stale = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed_at'):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM entries WHERE key = ?', stale)
+
+    def get_or_compute(self, key, compute, store_if=bool):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if store_if(value):
+                self.set(key, value)
+        return value
+
+
+class TTLCache:
+    """Thread-safe in-memory mapping with a per-entry TTL and least-recently-used eviction by count"""
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() > entry[1]:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
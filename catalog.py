@@ -0,0 +1,66 @@
+"""Catalogue of well-known subscription services."""
+import os
+
+from merchants import MerchantMatcher, load_merchants, DEFAULT_PATH
+
+# Subscription catalog with logos
+SUBSCRIPTION_CATALOG = {
+    'netflix': {'name': 'Netflix', 'category': 'streaming', 'logo': '🎬'},
+    'spotify': {'name': 'Spotify', 'category': 'streaming', 'logo': '🎵'},
+    'amazon prime': {'name': 'Amazon Prime', 'category': 'streaming', 'logo': '📦'},
+    'disney': {'name': 'Disney+', 'category': 'streaming', 'logo': '🏰'},
+    'chatgpt': {'name': 'ChatGPT Plus', 'category': 'software', 'logo': '🤖'},
+    'adobe': {'name': 'Adobe Creative Cloud', 'category': 'software', 'logo': '🎨'},
+    'microsoft': {'name': 'Microsoft 365', 'category': 'software', 'logo': '📊'},
+    'dropbox': {'name': 'Dropbox', 'category': 'storage', 'logo': '☁️'},
+    'apple': {'name': 'Apple Services', 'category': 'various', 'logo': '🍎'},
+    'google': {'name': 'Google Services', 'category': 'various', 'logo': '🔍'},
+}
+
+# Typical monthly price used to pre-fill the add-subscription form
+SUGGESTED_PRICES = {
+    'netflix': 15.99,
+    'spotify': 9.99,
+    'amazon prime': 14.99,
+    'disney': 13.99,
+    'chatgpt': 20.00,
+    'adobe': 54.99,
+    'microsoft': 9.99,
+    'dropbox': 11.99,
+    'apple': 9.99,
+    'google': 6.99
+}
+DEFAULT_SUGGESTED_PRICE = 9.99
+
+
+MERCHANT_DB = os.getenv('MERCHANT_DB', DEFAULT_PATH)
+
+
+def build_matcher(path=MERCHANT_DB):
+    """Compile the merchant database, falling back to the built-in catalog"""
+    if os.path.exists(path):
+        merchants = load_merchants(path)
+    else:
+        merchants = [dict(info, patterns=[key]) for key, info in SUBSCRIPTION_CATALOG.items()]
+    return MerchantMatcher(merchants)
+
+
+merchant_matcher = build_matcher()
+
+
+def match_catalog(name):
+    """Return the merchant entry matching `name` (a service name or bank descriptor), or None"""
+    return merchant_matcher.match(name)
+
+
+def get_subscription_info(name):
+    """Get subscription info from catalog"""
+    return match_catalog(name) or {'name': name, 'category': 'other', 'logo': '💳'}
+
+
+def catalog_listing():
+    """The catalog as served by /api/catalog"""
+    return [
+        dict(info, suggested_price=SUGGESTED_PRICES.get(key, DEFAULT_SUGGESTED_PRICE))
+        for key, info in SUBSCRIPTION_CATALOG.items()
+    ]
@@ -0,0 +1,80 @@
+"""Shrinks extracted statement text before it is sent to the LLM.
+
+Pages are separated by form feeds (see extraction.extract_text_from_pdf).
+Lines repeated at the top or bottom of most pages are running headers and
+footers and are kept only where they first appear. Apart from those, only
+lines that carry an amount or a year survive. Balance and total lines are
+dropped, and whitespace runs collapse to single spaces. Pages that keep any
+lines stay separated by form feeds, so llm.split_into_chunks can still cut
+at page breaks.
+"""
+import re
+
+from detector import YEAR
+
+# Bump whenever the rules below change so cached analyses are recomputed
+COMPACTION_VERSION = '2'
+
+# Lines at each end of a page that may be a running header or footer
+EDGE_LINES = 4
+# Share of pages a line must repeat on to count as a header or footer
+REPEAT_SHARE = 0.5
+
+MONEY = re.compile(r'\d{1,3}(?:[,.\s]?\d{3})*[.,]\d{2}(?!\d)|[$€£¥]\s?\d|\d\s?[A-Z]{3}\b')
+SUMMARY_LINE = re.compile(
+    r'^(?:(?:opening|closing|beginning|ending|previous|new|available|starting)\s+balance'
+    r'|balance\s+(?:brought|carried)\s+forward|(?:sub)?totals?\b)',
+    re.IGNORECASE
+)
+TOKEN = re.compile(r'\w+|[^\w\s]')
+
+
+def estimate_tokens(text):
+    """Rough LLM token count: words and punctuation marks, ignoring whitespace"""
+    return len(TOKEN.findall(text))
+
+
+def _key(line):
+    # Page numbers and dates change from page to page, so digits are masked
+    return re.sub(r'\d+', '#', line.lower())
+
+
+def repeated_edges(pages):
+    """Masked keys of amount-free lines found at the top or bottom of enough pages"""
+    if len(pages) < 2:
+        return set()
+
+    counts = {}
+    for lines in pages:
+        edges = lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+        for key in {_key(line) for line in edges if not MONEY.search(line)}:
+            counts[key] = counts.get(key, 0) + 1
+
+    threshold = max(2, len(pages) * REPEAT_SHARE)
+    return {key for key, count in counts.items() if count >= threshold}
+
+
+def compact(text):
+    """Drop running headers and footers, non-transaction lines and extra whitespace from `text`"""
+    pages = [[' '.join(line.split()) for line in page.split('\n')] for page in text.split('\f')]
+    pages = [[line for line in lines if line] for lines in pages]
+    repeated = repeated_edges(pages)
+
+    kept = []
+    seen = set()
+    for lines in pages:
+        kept.append([])
+        for line in lines:
+            key = _key(line)
+            if key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            if SUMMARY_LINE.match(line) or not (MONEY.search(line) or YEAR.search(line)):
+                continue
+            kept[-1].append(line)
+
+    # An unfamiliar layout with nothing recognisable still goes to the LLM, just without the whitespace
+    if not any(kept):
+        kept = pages
+    return '\n\f'.join('\n'.join(lines) for lines in kept if lines)
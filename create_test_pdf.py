@@ -1,30 +1,253 @@
+"""Synthetic bank statements for testing and benchmarking extraction and detection.
+
+Run without arguments to write the small fixed test_statement.pdf. With
+--corpus DIR it writes a seeded corpus of statements with configurable page
+counts, transaction density and layouts, plus ground_truth.json listing the
+subscriptions planted in each statement:
+
+    python create_test_pdf.py --corpus corpus/ --statements 10 --pages 60 --density 35 --seed 1
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date, timedelta
+
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-from datetime import datetime, timedelta
+
+from catalog import MERCHANT_DB
+from merchants import load_merchants
+
+# Everyday spending that is never a subscription: (descriptor, lowest, highest amount)
+ONE_OFF_MERCHANTS = [
+    ('WHOLEFDS MKT', 12, 240), ('TRADER JOES', 8, 160), ('SAFEWAY', 10, 220), ('KROGER', 10, 200),
+    ('COSTCO WHSE', 40, 420), ('SHELL OIL', 20, 90), ('CHEVRON', 20, 95), ('EXXONMOBIL', 18, 85),
+    ('CHIPOTLE', 9, 35), ('STARBUCKS', 4, 18), ('PANERA BREAD', 8, 40), ('SWEETGREEN', 11, 30),
+    ('DOORDASH', 15, 80), ('UBER TRIP', 7, 65), ('LYFT RIDE', 7, 60), ('TARGET', 10, 300),
+    ('WALGREENS', 5, 70), ('CVS PHARMACY', 5, 90), ('HOME DEPOT', 15, 500), ('ACE HARDWARE', 6, 120),
+    ('BEST BUY', 20, 900), ('IKEA', 25, 600), ('ETSY', 9, 120), ('PETCO', 10, 140)
+]
+# Recurring charges the catalog does not know, found only by the spacing of their charges
+UNLISTED_SUBSCRIPTIONS = [
+    ('IRONWORKS GYM', 'monthly', 29, 79), ('CITYNET BROADBAND', 'monthly', 45, 95),
+    ('BRIGHTSIDE INSURANCE', 'monthly', 60, 180), ('BLUEWAVE MOBILE', 'monthly', 25, 70),
+    ('GREENLEAF MEAL KIT', 'weekly', 50, 90), ('SUNRISE YOGA STUDIO', 'weekly', 15, 30),
+    ('METRO TRANSIT PASS', 'monthly', 80, 130)
+]
+# One-off purchases whose descriptors look like catalog merchants but are not subscriptions
+CATALOG_LOOKALIKES = [
+    ('APPLE STORE', 29, 1299), ('APPLEBEES GRILL', 25, 80), ('MICROSOFT STORE', 15, 400),
+    ('NINTENDO ESHOP', 10, 70), ('HULUSI KEBAB', 9, 35), ('XBOXING CLUB', 20, 60)
+]
+BANK_NAME = 'Bank of Example'
+
+
+def _money(amount):
+    return f'{abs(amount):,.2f}'
+
+
+# Each layout maps a transaction to the strings drawn in its columns, plus column x positions
+LAYOUTS = {
+    # ISO dates and signed amounts, like the fixed test statement
+    'simple': {
+        'columns': [('Date', 50), ('Description', 150), ('Amount', 430)],
+        'row': lambda tx, balance: [tx['date'].isoformat(), tx['descriptor'],
+                                    f"{'-' if tx['amount'] < 0 else ''}{_money(tx['amount'])}"]
+    },
+    # Year-less US dates with a running balance column
+    'register': {
+        'columns': [('Date', 50), ('Description', 110), ('Amount', 400), ('Balance', 490)],
+        'row': lambda tx, balance: [tx['date'].strftime('%m/%d'), tx['descriptor'],
+                                    f"{'-' if tx['amount'] < 0 else ''}{_money(tx['amount'])}",
+                                    _money(balance)]
+    },
+    # Spelled-out months, currency symbols and debits in parentheses
+    'ledger': {
+        'columns': [('Posted', 50), ('Transaction', 140), ('Amount', 450)],
+        'row': lambda tx, balance: [tx['date'].strftime('%b %d, %Y'), tx['descriptor'].title(),
+                                    f"(${_money(tx['amount'])})" if tx['amount'] < 0
+                                    else f"${_money(tx['amount'])}"]
+    }
+}
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    following = date(year + (month == 12), month % 12 + 1, 1)
+    return date(year, month, min(day.day, (following - timedelta(days=1)).day))
+
+
+def _charge_dates(first, frequency, end):
+    charges = []
+    step = 0
+    while True:
+        if frequency == 'weekly':
+            day = first + timedelta(days=7 * step)
+        else:
+            day = _add_months(first, step * (12 if frequency == 'yearly' else 1))
+        if day > end:
+            return charges
+        charges.append(day)
+        step += 1
+
+
+def _pick_subscriptions(rng, count):
+    """Draw `count` subscriptions, mostly from the catalog and some it does not list"""
+    catalog = load_merchants(MERCHANT_DB)
+    listed = rng.sample(catalog, min(len(catalog), count - count // 3))
+    unlisted = rng.sample(UNLISTED_SUBSCRIPTIONS, min(len(UNLISTED_SUBSCRIPTIONS), count // 3))
+
+    picked = []
+    for entry in listed:
+        pattern = entry['patterns'][0]
+        frequency = rng.choices(['monthly', 'yearly', 'weekly'], weights=[8, 2, 1])[0]
+        price = rng.choice([4.99, 7.99, 9.99, 11.99, 14.99, 15.49, 19.99, 22.99])
+        if frequency == 'yearly':
+            price = round(price * 10 - 0.01, 2)
+        picked.append({'name': entry['name'], 'descriptor': pattern.upper(), 'frequency': frequency,
+                       'amount': price})
+    for descriptor, frequency, low, high in unlisted:
+        picked.append({'name': descriptor.title(), 'descriptor': descriptor, 'frequency': frequency,
+                       'amount': round(rng.uniform(low, high), 2)})
+    return picked
+
+
+def plan_statement(rng, pages=3, density=35, months=3, subscriptions=8, lookalikes=2):
+    """Dated transactions for one statement and the subscriptions planted among them.
+
+    Returns (transactions, truth): `pages * density` transactions sorted by date,
+    and one ground-truth entry per subscription charged during the period.
+    `lookalikes` one-off purchases from CATALOG_LOOKALIKES are mixed in.
+    """
+    # Keep the period inside one calendar year so year-less layouts stay unambiguous
+    months = max(1, min(months, 12))
+    year = rng.randint(2021, 2025)
+    start = date(year, rng.randint(1, 13 - months), 1)
+    end = min(_add_months(start, months) - timedelta(days=1), date(year, 12, 31))
+    span = (end - start).days
+
+    transactions, truth = [], []
+    for sub in _pick_subscriptions(rng, subscriptions):
+        first = start + timedelta(days=rng.randint(0, 6 if sub['frequency'] == 'weekly' else 27))
+        charged = _charge_dates(first, sub['frequency'], end)
+        if not charged:
+            continue
+        # Real descriptors carry reference numbers that change from charge to charge
+        for day in charged:
+            transactions.append({'date': day, 'descriptor': f"{sub['descriptor']} {rng.randint(100000, 999999)}",
+                                 'amount': -sub['amount']})
+        truth.append({'name': sub['name'], 'amount': sub['amount'], 'frequency': sub['frequency'],
+                      'charges': len(charged)})
+
+    # Single purchases from catalog look-alikes must not be reported as subscriptions
+    for descriptor, low, high in rng.sample(CATALOG_LOOKALIKES, min(lookalikes, len(CATALOG_LOOKALIKES))):
+        transactions.append({'date': start + timedelta(days=rng.randint(0, span)),
+                             'descriptor': f'{descriptor} #{rng.randint(1000, 9999)}',
+                             'amount': -round(rng.uniform(low, high), 2)})
+
+    # Pay days keep the running balance positive and exercise the excluded-word rules
+    for day in _charge_dates(start + timedelta(days=rng.randint(0, 13)), 'weekly', end)[::2]:
+        transactions.append({'date': day, 'descriptor': 'PAYROLL DEPOSIT ACME CORP', 'amount': 2400.00})
+
+    while len(transactions) < pages * density:
+        descriptor, low, high = rng.choice(ONE_OFF_MERCHANTS)
+        transactions.append({'date': start + timedelta(days=rng.randint(0, span)),
+                             'descriptor': f'{descriptor} #{rng.randint(1000, 9999)}',
+                             'amount': -round(rng.uniform(low, high), 2)})
+
+    transactions.sort(key=lambda tx: tx['date'])
+    return transactions, truth
+
+
+def draw_statement(target, transactions, layout='simple', density=35):
+    """Render transactions to a PDF at `target` (a path or a binary file object), `density` rows per page"""
+    spec = LAYOUTS[layout]
+    c = canvas.Canvas(target, pagesize=letter)
+    width, height = letter
+    first, last = transactions[0]['date'], transactions[-1]['date']
+    pages = max(1, -(-len(transactions) // density))
+    row_height = min(18, (height - 200) / density)
+    balance = 5000.00
+
+    for page in range(pages):
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(50, height - 50, f"{BANK_NAME} - Account Statement")
+        c.setFont("Helvetica", 10)
+        c.drawString(50, height - 70, "Account Number: XXXX-XXXX-1234")
+        c.drawString(50, height - 85, f"Statement Period: {first:%B %d, %Y} - {last:%B %d, %Y}")
+
+        c.setFont("Helvetica-Bold", 10)
+        for title, x in spec['columns']:
+            c.drawString(x, height - 115, title)
+
+        c.setFont("Helvetica", 9)
+        y_position = height - 135
+        for tx in transactions[page * density:(page + 1) * density]:
+            balance += tx['amount']
+            for text, (_, x) in zip(spec['row'](tx, balance), spec['columns']):
+                c.drawString(x, y_position, text)
+            y_position -= row_height
+
+        c.setFont("Helvetica-Oblique", 8)
+        c.drawString(50, 40, f"Page {page + 1} of {pages}")
+        c.drawString(width - 230, 40, "Member FDIC. Questions? Call 1-800-555-0100")
+        c.showPage()
+    c.save()
+
+
+def generate_corpus(out_dir, statements=10, seed=1, pages=3, density=35, months=3, subscriptions=8,
+                    layouts=tuple(LAYOUTS)):
+    """Write `statements` PDFs cycling through `layouts` and return the ground truth written beside them"""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {'seed': seed, 'pages': pages, 'density': density, 'statements': []}
+
+    for index in range(statements):
+        # One generator per statement so each file is reproducible on its own
+        rng = random.Random(f'{seed}-{index}')
+        layout = layouts[index % len(layouts)]
+        transactions, truth = plan_statement(rng, pages, density, months, subscriptions)
+
+        filename = f'statement_{index:03d}_{layout}.pdf'
+        draw_statement(os.path.join(out_dir, filename), transactions, layout, density)
+        manifest['statements'].append({
+            'file': filename,
+            'layout': layout,
+            'pages': pages,
+            'transactions': len(transactions),
+            'period': [transactions[0]['date'].isoformat(), transactions[-1]['date'].isoformat()],
+            'subscriptions': truth
+        })
+
+    with open(os.path.join(out_dir, 'ground_truth.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
 
 def create_test_bank_statement():
     # Create a new PDF
     c = canvas.Canvas("test_statement.pdf", pagesize=letter)
     width, height = letter
-    
+
     # Add header
     c.setFont("Helvetica-Bold", 16)
     c.drawString(50, height - 50, "Bank of Example - Monthly Statement")
-    
+
     c.setFont("Helvetica", 12)
     c.drawString(50, height - 80, "Account Number: XXXX-XXXX-1234")
     c.drawString(50, height - 100, "Statement Period: January 1 - January 31, 2024")
-    
+
     # Add transactions header
     c.setFont("Helvetica-Bold", 12)
     c.drawString(50, height - 140, "Date")
     c.drawString(150, height - 140, "Description")
     c.drawString(400, height - 140, "Amount")
-    
+
     # Add sample transactions including subscriptions
     c.setFont("Helvetica", 10)
     y_position = height - 170
-    
+
     transactions = [
         ("2024-01-05", "NETFLIX.COM", "-15.99"),
         ("2024-01-07", "Grocery Store Purchase", "-125.43"),
@@ -38,41 +261,39 @@ def create_test_bank_statement():
         ("2024-01-28", "DISNEY PLUS", "-13.99"),
         ("2024-01-30", "Utility Bill - Electric", "-156.78"),
     ]
-    
+
     for date, desc, amount in transactions:
         c.drawString(50, y_position, date)
         c.drawString(150, y_position, desc)
         c.drawString(400, y_position, amount)
         y_position -= 20
-    
+
     # Save the PDF
     c.save()
     print("Test PDF created: test_statement.pdf")
 
-if __name__ == "__main__":
-    try:
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', metavar='DIR', help='write a generated corpus here instead of test_statement.pdf')
+    parser.add_argument('--statements', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=3)
+    parser.add_argument('--density', type=int, default=35, help='transactions per page')
+    parser.add_argument('--months', type=int, default=3, help='length of each statement period')
+    parser.add_argument('--subscriptions', type=int, default=8, help='subscriptions planted per statement')
+    parser.add_argument('--layouts', default=','.join(LAYOUTS))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if not args.corpus:
         create_test_bank_statement()
-    except ImportError:
-        print("Please install reportlab first: pip install reportlab")
-        print("Creating a simple text file instead...")
-        
-        # Create a simple text file as alternative
-        with open("test_statement.txt", "w") as f:
-            f.write("""Bank of Example - Monthly Statement
-Account Number: XXXX-XXXX-1234
-Statement Period: January 1 - January 31, 2024
-
-Date        Description                     Amount
-2024-01-05  NETFLIX.COM                     -15.99
-2024-01-07  Grocery Store Purchase          -125.43
-2024-01-10  SPOTIFY PREMIUM                 -9.99
-2024-01-12  AMAZON PRIME MEMBERSHIP         -14.99
-2024-01-15  Restaurant XYZ                  -45.67
-2024-01-18  ADOBE CREATIVE CLOUD            -54.99
-2024-01-20  Gas Station                     -65.00
-2024-01-22  APPLE ICLOUD+ STORAGE           -2.99
-2024-01-25  MICROSOFT 365 SUBSCRIPTION      -9.99
-2024-01-28  DISNEY PLUS                     -13.99
-2024-01-30  Utility Bill - Electric         -156.78
-""")
-        print("Test text file created: test_statement.txt")
\ No newline at end of file
+        return
+
+    manifest = generate_corpus(args.corpus, args.statements, args.seed, args.pages, args.density,
+                               args.months, args.subscriptions, args.layouts.split(','))
+    planted = sum(len(s['subscriptions']) for s in manifest['statements'])
+    print(f"Wrote {len(manifest['statements'])} statements ({planted} subscriptions) to {args.corpus}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Engine settings from the environment, and SQLite pragmas applied to every new connection.
+
+DATABASE_URL picks the database; any SQLAlchemy URL works. Pool settings
+only apply to pooled drivers (everything except in-memory SQLite). For
+SQLite files each connection is switched to WAL, so readers no longer
+block the writer. Each connection also waits for locks instead of
+failing with "database is locked" and syncs less often.
+"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+DEFAULT_URL = 'sqlite:///subscriptions.db'
+
+
+def _env_int(name):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else None
+
+
+def database_url():
+    return os.getenv('DATABASE_URL', DEFAULT_URL)
+
+
+def engine_options(url):
+    """SQLALCHEMY_ENGINE_OPTIONS from DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE and DB_POOL_PRE_PING"""
+    url = make_url(url)
+    options = {'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '0') == '1'}
+    # In-memory SQLite shares a single connection, so there is no pool to size
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+
+    for option, name in [('pool_size', 'DB_POOL_SIZE'), ('max_overflow', 'DB_MAX_OVERFLOW'),
+                         ('pool_timeout', 'DB_POOL_TIMEOUT'), ('pool_recycle', 'DB_POOL_RECYCLE')]:
+        value = _env_int(name)
+        if value is not None:
+            options[option] = value
+    return options
+
+
+def sqlite_pragmas():
+    """PRAGMA name -> value for new SQLite connections; an empty environment value skips that pragma"""
+    pragmas = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'busy_timeout': os.getenv('SQLITE_BUSY_TIMEOUT_MS', '15000'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        # Negative cache_size is in KiB: 20 MB of page cache per connection
+        'cache_size': os.getenv('SQLITE_CACHE_SIZE', '-20000'),
+        'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+    }
+    return {name: value for name, value in pragmas.items() if value}
+
+
+def enable_sqlite_pragmas(engine, pragmas=None):
+    """Run the pragmas on every connection `engine` opens. Does nothing for other databases."""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+    # WAL needs a file; in-memory databases reject it
+    if engine.url.database in (None, '', ':memory:'):
+        pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -0,0 +1,210 @@
+"""Deterministic recurring-charge detection from statement text.
+
+Transaction lines are parsed into (date, descriptor, amount), grouped by
+normalised merchant and amount, and classified using the subscription
+catalog and the spacing between charges. Only lines the rules cannot
+settle need to go to the LLM.
+"""
+import re
+import statistics
+from collections import defaultdict, namedtuple
+from datetime import date, datetime
+
+from catalog import match_catalog
+
+# Bump whenever the rules below change so cached analyses are recomputed
+DETECTOR_VERSION = '3'
+
+Transaction = namedtuple('Transaction', ['date', 'descriptor', 'amount', 'line'])
+
+MONTHS = 'jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec'
+DATE_PATTERN = (
+    r'\d{4}-\d{2}-\d{2}'
+    r'|\d{1,2}/\d{1,2}(?:/\d{2,4})?'
+    rf'|(?:{MONTHS})[a-z]*\.? \d{{1,2}}(?:,? \d{{4}})?'
+    rf'|\d{{1,2}} (?:{MONTHS})[a-z]*(?: \d{{4}})?'
+)
+AMOUNT_PATTERN = r'[-+]?\(?\$?\d{1,3}(?:,\d{3})*\.\d{2}\)?'
+TRANSACTION_LINE = re.compile(
+    rf'^\s*(?P<date>{DATE_PATTERN})\s+(?P<descriptor>.+?)\s+(?P<amount>{AMOUNT_PATTERN})'
+    rf'(?:\s*(?:CR|DR))?(?:\s+{AMOUNT_PATTERN})?\s*$',
+    re.IGNORECASE
+)
+YEAR = re.compile(r'\b(19|20)\d{2}\b')
+
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%b %d %Y', '%b %d, %Y', '%B %d %Y', '%B %d, %Y',
+                '%d %b %Y', '%d %B %Y']
+YEARLESS_FORMATS = ['%m/%d', '%b %d', '%B %d', '%d %b', '%d %B']
+
+# Words that mark a charge as possibly recurring even when the rules cannot confirm it
+SUBSCRIPTION_HINTS = {
+    'subscription', 'subscr', 'membership', 'member', 'premium', 'plan', 'monthly', 'annual',
+    'recurring', 'renewal', 'plus', 'pro', 'cloud', 'streaming', 'insurance', 'gym', 'fitness',
+    'internet', 'broadband', 'phone', 'wireless', 'mobile', 'utility', 'electric', 'water', 'gas bill'
+}
+# Lines that are never subscriptions
+EXCLUDED_WORDS = {
+    'refund', 'deposit', 'payroll', 'salary', 'transfer', 'interest', 'atm', 'withdrawal',
+    'balance', 'thank you', 'payment received', 'reversal'
+}
+# Tokens that carry no merchant identity in bank descriptors
+NOISE_TOKENS = {
+    'pos', 'purchase', 'debit', 'card', 'recurring', 'payment', 'ach', 'www', 'com', 'net',
+    'inc', 'ltd', 'llc', 'co', 'online', 'bill', 'autopay'
+}
+
+# (min days, max days, billing cycle) for the median gap between charges
+CYCLES = [(5, 9, 'weekly'), (26, 35, 'monthly'), (350, 380, 'yearly')]
+MONTHLY_FACTORS = {'weekly': 4.33, 'monthly': 1, 'yearly': 1 / 12}
+
+
+def monthly_equivalent(amount, billing_cycle):
+    return amount * MONTHLY_FACTORS.get(billing_cycle, 1)
+
+
+def parse_date(value, default_year):
+    value = re.sub(r'\s+', ' ', value.strip().replace('.', ''))
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    for fmt in YEARLESS_FORMATS:
+        try:
+            parsed = datetime.strptime(f'{value} {default_year}', f'{fmt} %Y')
+            return parsed.date()
+        except ValueError:
+            pass
+    return None
+
+
+def parse_amount(value):
+    negative = value.startswith('-') or value.startswith('(')
+    number = float(re.sub(r'[^\d.]', '', value))
+    return -number if negative else number
+
+
+def parse_transactions(text):
+    """Return every line of `text` that looks like a dated transaction"""
+    match = YEAR.search(text)
+    default_year = int(match.group(0)) if match else date.today().year
+
+    transactions = []
+    for line in text.splitlines():
+        match = TRANSACTION_LINE.match(line)
+        if not match:
+            continue
+        charged_on = parse_date(match.group('date'), default_year)
+        if charged_on is None:
+            continue
+        transactions.append(Transaction(
+            date=charged_on,
+            descriptor=match.group('descriptor').strip(),
+            amount=parse_amount(match.group('amount')),
+            line=line.strip()
+        ))
+    return transactions
+
+
+def normalize_merchant(descriptor):
+    """Reduce a bank descriptor like 'NETFLIX.COM 866-579' to a stable merchant key"""
+    words = re.sub(r'[^a-z0-9]+', ' ', descriptor.lower()).split()
+    words = [w for w in words if w not in NOISE_TOKENS and not any(ch.isdigit() for ch in w)]
+    return ' '.join(words[:3])
+
+
+def infer_cycle(dates):
+    dates = sorted(set(dates))
+    if len(dates) < 2:
+        return None
+    gap = statistics.median((b - a).days for a, b in zip(dates, dates[1:]))
+    for low, high, cycle in CYCLES:
+        if low <= gap <= high:
+            return cycle
+    return None
+
+
+def _has_word(text, words):
+    return any(re.search(rf'\b{re.escape(word)}\b', text) for word in words)
+
+
+def subscription_key(sub):
+    return normalize_merchant(sub['name']), round(float(sub['amount']), 2)
+
+
+def merge_subscriptions(*groups):
+    """Combine detections from several sources, keeping the first of each merchant/amount pair"""
+    seen = set()
+    merged = []
+    for group in groups:
+        for sub in group:
+            try:
+                key = subscription_key(sub)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if key not in seen:
+                seen.add(key)
+                merged.append(sub)
+    return merged
+
+
+def summarize(subscriptions):
+    """Build the {"subscriptions": [...], "total_monthly_cost": ...} result shape"""
+    total = sum(monthly_equivalent(float(s['amount']), s.get('frequency', 'monthly')) for s in subscriptions)
+    return {'subscriptions': subscriptions, 'total_monthly_cost': round(total, 2)}
+
+
+class Detection:
+    """Outcome of local detection: confident subscriptions plus lines left for the LLM"""
+
+    def __init__(self, subscriptions, unresolved, transaction_count):
+        self.subscriptions = subscriptions
+        self.unresolved = unresolved
+        self.transaction_count = transaction_count
+
+    def to_result(self):
+        return summarize(self.subscriptions)
+
+
+def detect_subscriptions(text):
+    return detect_in_transactions(parse_transactions(text))
+
+
+def detect_in_transactions(transactions):
+    """detect_subscriptions for transactions that are already parsed, e.g. from layout.extract_transactions"""
+    groups = defaultdict(list)
+    for tx in transactions:
+        descriptor = tx.descriptor.lower()
+        if _has_word(descriptor, EXCLUDED_WORDS):
+            continue
+        groups[(normalize_merchant(tx.descriptor), round(abs(tx.amount), 2))].append(tx)
+
+    subscriptions = []
+    unresolved = []
+    for (merchant, amount), charges in groups.items():
+        catalog_info = match_catalog(merchant) or match_catalog(charges[0].descriptor)
+        cycle = infer_cycle(tx.date for tx in charges)
+
+        if cycle and catalog_info:
+            name, category = catalog_info['name'], catalog_info['category']
+            confidence = 0.95
+        elif cycle and merchant:
+            name, category = merchant.title(), 'other'
+            confidence = 0.8
+        else:
+            # A single or irregular charge says nothing about the billing cycle, even from a known
+            # merchant (an Apple Store purchase, an annual plan), so the LLM decides
+            if catalog_info or _has_word(charges[0].descriptor.lower(), SUBSCRIPTION_HINTS):
+                unresolved.extend(tx.line for tx in charges)
+            continue
+
+        subscriptions.append({
+            'name': name,
+            'amount': amount,
+            'date': max(tx.date for tx in charges).isoformat(),
+            'frequency': cycle,
+            'category': category,
+            'confidence': confidence
+        })
+
+    return Detection(subscriptions, unresolved, len(transactions))
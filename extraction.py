@@ -0,0 +1,137 @@
+"""Page-parallel PDF text extraction shared by app.py and app_modern.py."""
+import io
+import os
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+import pdfplumber
+
+# Bump whenever the text format changes so cached text is re-extracted (2: form feeds between pages)
+EXTRACTION_VERSION = '2'
+
+DEFAULT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', os.cpu_count() or 1))
+# Below this many pages per worker, process start-up costs more than it saves
+MIN_PAGES_PER_WORKER = int(os.getenv('PDF_MIN_PAGES_PER_WORKER', 4))
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def open_source(source):
+    """A path or file object that pdfplumber and PyPDF2 can open, from a path, file object or PDF bytes"""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
+
+
+def count_pages(source):
+    try:
+        return len(PyPDF2.PdfReader(open_source(source)).pages)
+    except Exception:
+        with pdfplumber.open(open_source(source)) as pdf:
+            return len(pdf.pages)
+
+
+def extract_page_range(source, start, stop):
+    """Extract pages [start, stop) with pdfplumber, falling back to PyPDF2 for any page that fails"""
+    texts = []
+    reader = None
+
+    try:
+        pdf = pdfplumber.open(open_source(source))
+    except Exception as e:
+        logger.warning('pdfplumber could not open the PDF: %s', e)
+        pdf = None
+
+    try:
+        for page_num in range(start, stop):
+            page_text = None
+            if pdf is not None:
+                try:
+                    page = pdf.pages[page_num]
+                    page_text = page.extract_text() or ''
+                    page.close()
+                except Exception as e:
+                    logger.warning('pdfplumber failed on page %d: %s', page_num + 1, e)
+
+            if page_text is None:
+                try:
+                    if reader is None:
+                        reader = PyPDF2.PdfReader(open_source(source))
+                    page_text = reader.pages[page_num].extract_text() or ''
+                except Exception as e:
+                    logger.warning('PyPDF2 failed on page %d: %s', page_num + 1, e)
+                    page_text = ''
+
+            texts.append(page_text)
+    finally:
+        if pdf is not None:
+            pdf.close()
+
+    return texts
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Forking a process that runs upload, LLM and gRPC threads can deadlock the child;
+            # forkserver children start from a clean single-threaded server instead. Like spawn,
+            # each child re-imports the entry script as __mp_main__, so a script that uses this
+            # pool must start its server under `if __name__ == '__main__':` and keep other
+            # start-up work (opening caches, connections) lazy or in a factory
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('forkserver'))
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def map_page_ranges(func, source, workers=None):
+    """Call `func(source, start, stop)` over contiguous page ranges across a process pool.
+
+    Returns the results in page order, or [] if the PDF cannot be read.
+    """
+    workers = workers or DEFAULT_WORKERS
+
+    try:
+        page_count = count_pages(source)
+    except Exception as e:
+        logger.warning('Could not read PDF: %s', e)
+        return []
+
+    chunks = min(workers, page_count // MIN_PAGES_PER_WORKER)
+    if chunks <= 1:
+        return [func(source, 0, page_count)]
+
+    # Each worker opens the document once and handles a contiguous block of pages
+    step = -(-page_count // chunks)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+    pool = _get_pool(workers)
+    futures = [pool.submit(func, source, start, stop) for start, stop in ranges]
+    return [future.result() for future in futures]
+
+
+def extract_pages(source, workers=None):
+    """Return the text of every page, fanning page ranges out across a process pool"""
+    return [text for texts in map_page_ranges(extract_page_range, source, workers) for text in texts]
+
+
+def extract_text_from_pdf(source, workers=None):
+    """All page text, with a form feed starting each page after the first"""
+    pages = extract_pages(source, workers)
+    return '\f'.join(page_text + "\n" for page_text in pages if page_text)
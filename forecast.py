@@ -0,0 +1,110 @@
+"""Project subscriptions forward into dated charges with vectorised date arithmetic.
+
+Every subscription is expanded into the billing dates that fall inside the
+horizon in a single pass of array operations, then the charges are summed
+per day, per month and per category.
+"""
+import numpy as np
+
+# Billing cycles as (calendar unit, step). Month-based cycles keep the anchor's
+# day of month, clamped to the length of shorter months (Jan 31 -> Feb 28/29).
+CYCLE_STEPS = {'weekly': ('D', 7), 'monthly': ('M', 1), 'yearly': ('M', 12)}
+DEFAULT_CYCLE = 'monthly'
+
+MAX_HORIZON_DAYS = 10 * 366
+
+
+def _repeat_ranges(lo, hi):
+    """Flatten the integer ranges [lo[i], hi[i]] into (owner index, value) arrays"""
+    counts = np.maximum(hi - lo + 1, 0)
+    owner = np.repeat(np.arange(len(lo)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, lo[owner] + offsets
+
+
+def _expand_days(anchors, step, start, end):
+    days = anchors.astype(np.int64)
+    start, end = start.astype(np.int64), end.astype(np.int64)
+    # First step on or after the horizon start, but never before the anchor itself
+    lo = np.maximum(0, -((days - start) // step))
+    hi = (end - days) // step
+    owner, k = _repeat_ranges(lo, hi)
+    return owner, (days[owner] + step * k).astype('datetime64[D]')
+
+
+def _expand_months(anchors, step, start, end):
+    months = anchors.astype('datetime64[M]')
+    day_offset = anchors - months.astype('datetime64[D]')
+    month_index = months.astype(np.int64)
+
+    start_month = start.astype('datetime64[M]').astype(np.int64)
+    end_month = end.astype('datetime64[M]').astype(np.int64)
+    lo = np.maximum(0, (start_month - month_index) // step)
+    hi = (end_month - month_index) // step
+    owner, k = _repeat_ranges(lo, hi)
+
+    billing_month = (month_index[owner] + step * k).astype('datetime64[M]')
+    month_start = billing_month.astype('datetime64[D]')
+    month_end = (billing_month + 1).astype('datetime64[D]') - 1
+    dates = np.minimum(month_start + day_offset[owner], month_end)
+
+    # The first and last candidate months can overhang the horizon
+    inside = (dates >= start) & (dates <= end)
+    return owner[inside], dates[inside]
+
+
+def expand(anchors, cycles, start, end):
+    """Billing dates in [start, end] for subscriptions first charged on `anchors`.
+
+    Returns (subscription index, date) arrays, grouped by billing cycle rather than sorted.
+    """
+    anchors = np.asarray(anchors, dtype='datetime64[D]')
+    cycles = np.asarray(cycles, dtype=object)
+    start, end = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+
+    owners, dates = [], []
+    for cycle, (unit, step) in CYCLE_STEPS.items():
+        if cycle == DEFAULT_CYCLE:
+            selected = np.flatnonzero(~np.isin(cycles, [c for c in CYCLE_STEPS if c != cycle]))
+        else:
+            selected = np.flatnonzero(cycles == cycle)
+        if not len(selected):
+            continue
+        expander = _expand_days if unit == 'D' else _expand_months
+        owner, when = expander(anchors[selected], step, start, end)
+        owners.append(selected[owner])
+        dates.append(when)
+
+    if not owners:
+        return np.array([], dtype=np.int64), np.array([], dtype='datetime64[D]')
+    return np.concatenate(owners), np.concatenate(dates)
+
+
+def _totals(labels, index, amounts):
+    """Sum `amounts` into buckets `index` and label the non-empty ones"""
+    sums = np.bincount(index, weights=amounts, minlength=len(labels))
+    return {str(labels[i]): round(float(sums[i]), 2) for i in np.flatnonzero(sums)}
+
+
+def forecast(anchors, cycles, amounts, categories, start, end):
+    """Dated spend between start and end (inclusive) for parallel subscription arrays"""
+    start, end = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+    owner, dates = expand(anchors, cycles, start, end)
+    charges = np.asarray(amounts, dtype=np.float64)[owner]
+
+    # Bucket by offset from the start of the horizon instead of sorting the charges
+    days = np.arange(start, end + 1)
+    months = np.arange(start.astype('datetime64[M]'), end.astype('datetime64[M]') + 1)
+    day_index = (dates - start).astype(np.int64)
+    month_index = (dates.astype('datetime64[M]') - months[0]).astype(np.int64)
+    category_labels, category_codes = np.unique(np.asarray(categories, dtype=str), return_inverse=True)
+
+    return {
+        'start': str(start),
+        'end': str(end),
+        'total': round(float(charges.sum()), 2),
+        'charge_count': int(len(dates)),
+        'by_day': _totals(days, day_index, charges),
+        'by_month': _totals(months, month_index, charges),
+        'by_category': _totals(category_labels, category_codes[owner], charges)
+    }
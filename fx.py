@@ -0,0 +1,100 @@
+"""Currency conversion from a local exchange-rate table; no network access.
+
+Rates live in data/fx_rates.json as units of each currency per one unit of
+the table's base currency. The parsed table is kept in memory and only
+re-read when the file changes.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+from cache import sha256_digest
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fx_rates.json')
+FX_RATES_PATH = os.getenv('FX_RATES_PATH', DEFAULT_PATH)
+
+
+class UnknownCurrency(ValueError):
+    """Raised for a currency code missing from the rate table"""
+
+
+def normalize_currency(code, default='USD'):
+    return (code or default).strip().upper()
+
+
+class FXTable:
+    def __init__(self, rates, base='USD', as_of=None):
+        self.base = normalize_currency(base)
+        self.rates = {normalize_currency(code): float(rate) for code, rate in rates.items()}
+        self.rates.setdefault(self.base, 1.0)
+        self.as_of = as_of
+        # Changes whenever any rate does; part of cache keys and ETags for converted totals
+        self.version = sha256_digest(*sorted(self.rates.items()))[:12]
+
+    def __contains__(self, code):
+        return isinstance(code, str) and normalize_currency(code, '') in self.rates
+
+    def rate(self, source, target):
+        """Units of `target` per unit of `source`"""
+        try:
+            return self.rates[normalize_currency(target)] / self.rates[normalize_currency(source)]
+        except KeyError as e:
+            raise UnknownCurrency(f'No exchange rate for {e.args[0]}') from None
+
+    def convert(self, amounts, currencies, target, missing=np.nan):
+        """Convert parallel arrays of amounts and currency codes into `target`.
+
+        Rates are looked up once per distinct currency, not per amount. Amounts in
+        currencies missing from the table come back as `missing`.
+        """
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if not len(amounts):
+            return amounts
+        target_rate = self.rates.get(normalize_currency(target))
+        if target_rate is None:
+            raise UnknownCurrency(f'No exchange rate for {target}')
+
+        codes, inverse = np.unique(np.asarray(currencies, dtype=str), return_inverse=True)
+        source_rates = np.array([self.rates.get(code.upper(), np.nan) for code in codes])
+        converted = amounts * (target_rate / source_rates)[inverse]
+        if not np.isnan(missing):
+            converted[np.isnan(converted)] = missing
+        return converted
+
+
+def load_table(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return FXTable(data['rates'], data.get('base', 'USD'), data.get('as_of'))
+
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def fx_table(path=FX_RATES_PATH):
+    """The rate table at `path`, reloaded only when the file's modification time changes"""
+    mtime = os.stat(path).st_mtime
+    with _lock:
+        cached = _loaded.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = _loaded[path] = (mtime, load_table(path))
+    return cached[1]
+
+
+def convert_and_sum(groups, amounts, currencies, target, table=None):
+    """Convert amounts to `target` and total them per group.
+
+    Returns ({group: total}, overall total, sorted currencies that had no rate and were left out).
+    """
+    table = table or fx_table()
+    converted = table.convert(amounts, currencies, target)
+    missing = np.isnan(converted)
+    unconverted = sorted({currencies[i] for i in np.flatnonzero(missing)})
+    converted = np.where(missing, 0.0, converted)
+
+    labels, inverse = np.unique(np.asarray(groups, dtype=str), return_inverse=True)
+    sums = np.bincount(inverse, weights=converted, minlength=len(labels))
+    return {str(label): float(total) for label, total in zip(labels, sums)}, float(converted.sum()), unconverted
@@ -0,0 +1,23 @@
+"""gunicorn settings, read automatically when gunicorn starts in this directory.
+
+With PROMETHEUS_MULTIPROC_DIR set, every worker writes its metrics to files in that directory
+(see metrics.py). Files left by a previous run are removed at start-up, and a worker that exits
+is marked dead so its queue depth no longer counts.
+"""
+import glob
+import os
+
+
+def on_starting(server):
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,79 @@
+"""Bounded background worker pool for statement processing."""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no free slots"""
+
+
+class JobQueue:
+    """Thread pool that refuses new work once `max_depth` jobs are queued or running.
+
+    `on_depth_change(depth)`, if given, is called with the new depth whenever it changes.
+    """
+
+    def __init__(self, max_workers=4, max_depth=32, name='job', on_depth_change=None):
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.on_depth_change = on_depth_change or (lambda depth: None)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{name}-worker')
+        self._lock = threading.Lock()
+        self._depth = 0
+
+    @property
+    def depth(self):
+        return self._depth
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._depth >= self.max_depth:
+                raise QueueFull(f'Job queue is full ({self.max_depth} pending)')
+            self._depth += 1
+            self.on_depth_change(self._depth)
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+
+        future.add_done_callback(self._done)
+        return future
+
+    def submit_all(self, fn, arg_lists):
+        """Submit one job per argument tuple, or none of them if the queue cannot take them all"""
+        with self._lock:
+            if self._depth + len(arg_lists) > self.max_depth:
+                raise QueueFull(f'Job queue cannot take {len(arg_lists)} more jobs ({self._depth}/{self.max_depth} pending)')
+            self._depth += len(arg_lists)
+            self.on_depth_change(self._depth)
+
+        futures = []
+        for i, args in enumerate(arg_lists):
+            try:
+                future = self._executor.submit(fn, *args)
+            except Exception:
+                for _ in arg_lists[i:]:
+                    self._release()
+                raise
+            future.add_done_callback(self._done)
+            futures.append(future)
+        return futures
+
+    def _done(self, future):
+        self._release()
+        # Nobody may ever call result() on a job's future, so its exception would vanish
+        if not future.cancelled() and future.exception() is not None:
+            logger.error('Job failed', exc_info=future.exception())
+
+    def _release(self):
+        with self._lock:
+            self._depth -= 1
+            self.on_depth_change(self._depth)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
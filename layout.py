@@ -0,0 +1,178 @@
+"""Layout-aware transaction extraction from pdfplumber word positions.
+
+Each page is read once with extract_words() instead of being flattened to
+text and re-parsed. Words are grouped into rows by their vertical position
+and into cells by the horizontal gaps between them. A row is a transaction
+when it starts with a date and has an amount in a later column. The first
+amount column after the description wins, so a running balance is ignored.
+A row without a date or amount that sits directly under a description, at
+the same x position, continues that description. Transactions come back
+as parallel arrays, so memory grows with the number of rows, not with the
+page text.
+"""
+import logging
+import re
+from datetime import date
+
+import numpy as np
+import pdfplumber
+
+from detector import AMOUNT_PATTERN, DATE_PATTERN, YEAR, Transaction, parse_amount, parse_date
+from extraction import map_page_ranges, open_source
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the rules below change so cached rows are re-extracted
+LAYOUT_VERSION = '1'
+
+# Words whose tops are closer than this many points share a row
+ROW_TOLERANCE = 3
+# A gap wider than this fraction of the text height separates two cells
+CELL_GAP = 0.6
+# '2024-01-15' is one word, 'Jan 15, 2024' is three
+MAX_DATE_WORDS = 3
+
+DATE = re.compile(rf'(?:{DATE_PATTERN})', re.IGNORECASE)
+AMOUNT = re.compile(rf'(?:{AMOUNT_PATTERN})')
+
+
+class TransactionColumns:
+    """Parallel arrays of transaction dates (datetime64[D]), descriptors and amounts"""
+
+    def __init__(self, dates=(), descriptors=(), amounts=()):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.descriptors = list(descriptors)
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.descriptors)
+
+    def transactions(self):
+        """detector.Transaction tuples, for the rule-based detector and for storage"""
+        return [
+            Transaction(day, descriptor, amount, f'{day.isoformat()} {descriptor} {amount:.2f}')
+            for day, descriptor, amount in zip(self.dates.tolist(), self.descriptors, self.amounts.tolist())
+        ]
+
+    def to_json(self):
+        return {
+            'dates': [day.isoformat() for day in self.dates.tolist()],
+            'descriptors': self.descriptors,
+            'amounts': self.amounts.tolist()
+        }
+
+    @classmethod
+    def from_json(cls, value):
+        return cls(value['dates'], value['descriptors'], value['amounts'])
+
+
+def _text(words):
+    return ' '.join(word['text'] for word in words)
+
+
+def _rows(words):
+    """Group words into rows from top to bottom, each row ordered left to right"""
+    rows = []
+    current = []
+    for word in sorted(words, key=lambda w: (w['top'], w['x0'])):
+        if current and word['top'] - current[0]['top'] > ROW_TOLERANCE:
+            rows.append(sorted(current, key=lambda w: w['x0']))
+            current = []
+        current.append(word)
+    if current:
+        rows.append(sorted(current, key=lambda w: w['x0']))
+    return rows
+
+
+def _starts_cell(row, i):
+    word, previous = row[i], row[i - 1]
+    return word['x0'] - previous['x1'] > CELL_GAP * (word['bottom'] - word['top'])
+
+
+def parse_row(row):
+    """(date text, descriptor words, amount text) if the row is a transaction, else None"""
+    for count in range(min(MAX_DATE_WORDS, len(row) - 2), 0, -1):
+        if DATE.fullmatch(_text(row[:count])):
+            break
+    else:
+        return None
+
+    rest = row[count:]
+    amounts = [i for i in range(1, len(rest)) if AMOUNT.fullmatch(rest[i]['text'])]
+    column = [i for i in amounts if _starts_cell(rest, i)]
+    if column:
+        at = column[0]
+    else:
+        # No column gaps to go on: take the first of the amounts ending the row, as detector.TRANSACTION_LINE does
+        at = len(rest)
+        while at - 1 in amounts:
+            at -= 1
+        if at == len(rest):
+            return None
+    return _text(row[:count]), rest[:at], rest[at]['text']
+
+
+def extract_page_range_rows(source, start, stop):
+    """Transactions on pages [start, stop) as (dates, descriptors, amounts) lists, plus the first year printed"""
+    dates, descriptors, amounts = [], [], []
+    year = None
+
+    try:
+        pdf = pdfplumber.open(open_source(source))
+    except Exception as e:
+        logger.warning('pdfplumber could not open the PDF: %s', e)
+        return dates, descriptors, amounts, year
+
+    with pdf:
+        for page_num in range(start, stop):
+            try:
+                page = pdf.pages[page_num]
+                try:
+                    words = page.extract_words()
+                finally:
+                    page.close()
+            except Exception as e:
+                logger.warning('pdfplumber failed on page %d: %s', page_num + 1, e)
+                words = []
+
+            # (x0, bottom) of the description in the previous row, while continuation lines may follow
+            description = None
+            for row in _rows(words):
+                if year is None:
+                    match = YEAR.search(_text(row))
+                    year = int(match.group(0)) if match else None
+
+                parsed = parse_row(row)
+                if parsed:
+                    date_text, descriptor, amount_text = parsed
+                    dates.append(date_text)
+                    descriptors.append(_text(descriptor))
+                    amounts.append(parse_amount(amount_text))
+                    description = (descriptor[0]['x0'], row[0]['bottom'])
+                elif (description and abs(row[0]['x0'] - description[0]) <= ROW_TOLERANCE
+                      and row[0]['top'] - description[1] < row[0]['bottom'] - row[0]['top']
+                      and not any(AMOUNT.fullmatch(word['text']) for word in row)):
+                    descriptors[-1] += ' ' + _text(row)
+                    description = (description[0], row[0]['bottom'])
+                else:
+                    description = None
+
+    return dates, descriptors, amounts, year
+
+
+def extract_transactions(source, workers=None):
+    """Every transaction row in the PDF as TransactionColumns; empty when the layout has none"""
+    ranges = map_page_ranges(extract_page_range_rows, source, workers)
+    # Year-less dates take the first year printed anywhere in the statement, as in detector.parse_transactions
+    years = [year for *_, year in ranges if year is not None]
+    default_year = years[0] if years else date.today().year
+
+    dates, descriptors, amounts = [], [], []
+    for range_dates, range_descriptors, range_amounts, _ in ranges:
+        for text, descriptor, amount in zip(range_dates, range_descriptors, range_amounts):
+            day = parse_date(text, default_year)
+            if day is not None:
+                dates.append(day)
+                descriptors.append(descriptor)
+                amounts.append(amount)
+    return TransactionColumns(dates, descriptors, amounts)
@@ -0,0 +1,146 @@
+"""LLM analysis of extracted statement text."""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import compaction
+from detector import merge_subscriptions, summarize
+from llm_client import client_from_env
+from metrics import span, LLM_INPUT_TOKENS
+
+# Statements longer than this are split into transaction-aligned chunks analysed concurrently
+CHUNK_CHARS = int(os.getenv('LLM_CHUNK_CHARS', 12000))
+# Upper bound on Gemini calls in flight across all uploads in this process
+CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', 4))
+# Strip headers, footers and non-transaction lines before sending text (see compaction.py)
+COMPACT = os.getenv('LLM_COMPACT', '1') == '1'
+
+# Bump whenever PROMPT changes so cached analyses from the old prompt are not reused
+PROMPT_VERSION = '2'
+
+PROMPT = """
+    Analyze this bank statement and identify all recurring subscriptions or monthly charges.
+    Look for patterns like:
+    - Netflix, Spotify, Apple Music, Amazon Prime, Disney+, YouTube Premium
+    - Software subscriptions like Adobe, Microsoft, Dropbox, ChatGPT
+    - Utilities, phone bills, internet services
+    - Any recurring monthly or annual charges
+    
+    For each subscription found, extract:
+    1. Service/Company name
+    2. Amount charged
+    3. Currency of the charge as an ISO 4217 code (USD, EUR, GBP, ...)
+    4. Date of charge
+    5. Frequency (if determinable)
+    6. Category (streaming, software, utilities, etc.)
+    
+    Return the results as a JSON array with the following structure:
+    {
+        "subscriptions": [
+            {
+                "name": "Service Name",
+                "amount": 9.99,
+                "currency": "USD",
+                "date": "2024-01-15",
+                "frequency": "monthly",
+                "category": "streaming",
+                "confidence": 0.95
+            }
+        ],
+        "total_monthly_cost": 99.99
+    }
+    
+    Only return valid JSON, no additional text.
+    """
+
+# Backend chosen by LLM_BACKEND ('gemini' or the offline 'stub'), shared by every upload
+client = client_from_env()
+
+_chunk_pool = ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix='gemini')
+
+def split_into_chunks(text, max_chars=CHUNK_CHARS):
+    """Split on line boundaries, preferring page breaks and blank lines, so no transaction is cut in half"""
+    chunks = []
+    current = []
+    size = 0
+    for line in text.split('\n'):
+        if size + len(line) + 1 > max_chars and current:
+            # Back up to the last page break or blank line in this chunk if there is one;
+            # a page's first line starts the next chunk, a blank line ends this one
+            cut = len(current)
+            for i in range(len(current) - 1, len(current) // 2, -1):
+                if current[i].startswith('\f'):
+                    cut = i
+                    break
+                if not current[i].strip():
+                    cut = i + 1
+                    break
+            chunks.append('\n'.join(current[:cut]))
+            current = current[cut:]
+            size = sum(len(l) + 1 for l in current)
+        current.append(line)
+        size += len(line) + 1
+    if any(l.strip() for l in current):
+        chunks.append('\n'.join(current))
+    return chunks
+
+def parse_response(result_text):
+    with span('parse', chars=len(result_text)):
+        result_text = result_text.strip()
+
+        if result_text.startswith('```json'):
+            result_text = result_text[7:]
+        if result_text.endswith('```'):
+            result_text = result_text[:-3]
+
+        result = json.loads(result_text)
+        if not isinstance(result.get('subscriptions'), list):
+            raise ValueError('Response has no subscriptions list')
+        return result
+
+def analyze_chunk(text):
+    """One LLM call; the client retries failed requests and malformed responses"""
+    # Includes retries and parsing, which has its own 'parse' span
+    with span('llm', chars=len(text)):
+        return client.generate(PROMPT, text, parse=parse_response)
+
+def compact_input(text):
+    """compaction.compact, counting estimated tokens before and after"""
+    with span('compact', chars=len(text)) as fields:
+        compacted = compaction.compact(text)
+        tokens, kept = compaction.estimate_tokens(text), compaction.estimate_tokens(compacted)
+        fields.update(chars_out=len(compacted), tokens=tokens, tokens_out=kept,
+                      ratio=round(kept / tokens, 3) if tokens else 1.0)
+    LLM_INPUT_TOKENS.labels('extracted').inc(tokens)
+    LLM_INPUT_TOKENS.labels('sent').inc(kept)
+    return compacted
+
+def process_with_gemini(text, compact=None):
+    if COMPACT if compact is None else compact:
+        text = compact_input(text)
+    chunks = split_into_chunks(text)
+    if not chunks:
+        return {"subscriptions": [], "total_monthly_cost": 0}
+
+    futures = [_chunk_pool.submit(analyze_chunk, chunk) for chunk in chunks]
+
+    results = []
+    errors = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            errors.append(str(e))
+
+    if not results:
+        return {"error": errors[0], "subscriptions": [], "total_monthly_cost": 0}
+
+    result = summarize(merge_subscriptions(*(r['subscriptions'] for r in results)))
+    # A partial result carries the error so it is not cached as final
+    if errors:
+        result['error'] = f'{len(errors)} of {len(chunks)} chunks failed: {errors[0]}'
+    return result
@@ -0,0 +1,149 @@
+"""LLM backends and a client that adds deadlines, retries and rate limiting."""
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(Exception):
+    """Raised when an LLM call fails after all retries"""
+
+
+class RateLimited(LLMError):
+    """Raised when no request token becomes available before the call's deadline"""
+
+
+class TokenBucket:
+    """Allow `rate` requests per second on average with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class GeminiBackend:
+    def __init__(self, model_name='gemini-1.5-flash', api_key=None):
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key or os.getenv('GEMINI_API_KEY'))
+        # One model object per process so its gRPC channel is reused across calls
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, text, timeout):
+        response = self.model.generate_content([prompt, text], request_options={'timeout': timeout})
+        return response.text
+
+
+class StubBackend:
+    """Offline stand-in for Gemini with configurable latency, for load-testing the upload pipeline.
+
+    Responses come from the local rule-based detector so they have the same shape as real ones.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    def generate(self, prompt, text, timeout):
+        from detector import detect_subscriptions
+
+        self.calls += 1
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        if delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f'Stub backend took longer than {timeout}s')
+        time.sleep(delay)
+
+        if self._random.random() < self.failure_rate:
+            raise ConnectionError('Stub backend injected failure')
+        return json.dumps(detect_subscriptions(text).to_result())
+
+
+class LLMClient:
+    """Wraps a backend with a per-call deadline, exponential backoff with full jitter and a rate limiter"""
+
+    def __init__(self, backend, timeout=30.0, max_retries=2, backoff_base=0.5, backoff_max=8.0, rate_limiter=None):
+        self.backend = backend
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def generate(self, prompt, text, parse=None):
+        """Call the backend, retrying failed requests and responses that `parse` rejects"""
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self.backoff(attempt - 1))
+
+            if self.rate_limiter and not self.rate_limiter.acquire(timeout=self.timeout):
+                error = RateLimited('Timed out waiting for an LLM request slot')
+                continue
+
+            try:
+                result_text = self.backend.generate(prompt, text, self.timeout)
+                return parse(result_text) if parse else result_text
+            except Exception as e:
+                logger.warning('LLM call failed (attempt %d/%d): %s', attempt + 1, self.max_retries + 1, e)
+                error = e
+
+        raise LLMError(str(error)) from error
+
+
+def client_from_env():
+    backend_name = os.getenv('LLM_BACKEND', 'gemini')
+    if backend_name == 'stub':
+        backend = StubBackend(
+            latency=float(os.getenv('LLM_STUB_LATENCY', 0.5)),
+            jitter=float(os.getenv('LLM_STUB_JITTER', 0)),
+            failure_rate=float(os.getenv('LLM_STUB_FAILURE_RATE', 0))
+        )
+    elif backend_name == 'gemini':
+        backend = GeminiBackend(os.getenv('GEMINI_MODEL', 'gemini-1.5-flash'))
+    else:
+        raise ValueError(f'Unknown LLM_BACKEND: {backend_name}')
+
+    rate = float(os.getenv('LLM_RATE_LIMIT', 5))
+    return LLMClient(
+        backend,
+        timeout=float(os.getenv('LLM_TIMEOUT', 30)),
+        max_retries=int(os.getenv('LLM_MAX_RETRIES', 2)),
+        backoff_base=float(os.getenv('LLM_BACKOFF_BASE', 0.5)),
+        backoff_max=float(os.getenv('LLM_BACKOFF_MAX', 8)),
+        rate_limiter=TokenBucket(rate, int(os.getenv('LLM_BURST', 10))) if rate > 0 else None
+    )
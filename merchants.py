@@ -0,0 +1,117 @@
+"""Merchant database compiled into an Aho-Corasick matcher over bank descriptors.
+
+A descriptor such as 'NETFLIX.COM 866-579' or 'SPOTIFY P0A1B2' is
+normalised and scanned once for every known merchant pattern, so lookup
+cost depends on the descriptor length rather than the number of merchants.
+"""
+import csv
+import json
+import os
+import re
+from collections import deque
+from functools import lru_cache
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'merchants.json')
+
+
+def normalize_descriptor(descriptor):
+    """Lower-case and reduce punctuation to single spaces: 'NETFLIX.COM*866' -> 'netflix com 866'"""
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', descriptor.lower()).split())
+
+
+def load_merchants(path):
+    """Read merchants from JSON (a list of objects) or CSV (patterns separated by '|')"""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            return [
+                {
+                    'name': row['name'],
+                    'category': row.get('category') or 'other',
+                    'logo': row.get('logo') or '💳',
+                    'patterns': [p for p in (row.get('patterns') or '').split('|') if p] or [row['name']]
+                }
+                for row in csv.DictReader(f)
+            ]
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+class MerchantMatcher:
+    def __init__(self, merchants, cache_size=65536):
+        self.merchants = []
+        # Trie as parallel lists: goto transitions, failure links and the pattern ending at each node
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]
+
+        for merchant in merchants:
+            info = {'name': merchant['name'], 'category': merchant.get('category', 'other'),
+                    'logo': merchant.get('logo', '💳')}
+            self.merchants.append(info)
+            for pattern in merchant.get('patterns') or [merchant['name']]:
+                self._add(normalize_descriptor(pattern), len(self.merchants) - 1)
+        self._build_links()
+
+        self._cached_lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _add(self, pattern, merchant_index):
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            next_node = self._goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][ch] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            node = next_node
+        # The first merchant to claim a pattern keeps it
+        if self._output[node] is None:
+            self._output[node] = (len(pattern), merchant_index)
+
+    def _build_links(self):
+        # Breadth-first so every failure link points at an already-linked, shallower node.
+        # _dict_link skips straight to the next node on the failure chain that ends a pattern.
+        self._dict_link = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0) if node else 0
+                link = self._fail[child]
+                self._dict_link[child] = link if self._output[link] else self._dict_link[link]
+
+    def _lookup(self, descriptor):
+        text = normalize_descriptor(descriptor)
+        goto, fail, output, dict_link = self._goto, self._fail, self._output, self._dict_link
+
+        best = None
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            # Every pattern ending here; it only counts if it starts and ends at a word boundary
+            if i + 1 < len(text) and text[i + 1] != ' ':
+                continue
+            candidate = node if output[node] else dict_link[node]
+            while candidate:
+                length, merchant_index = output[candidate]
+                start = i - length + 1
+                if (start == 0 or text[start - 1] == ' ') and (
+                        best is None or length > best[0] or (length == best[0] and merchant_index < best[1])):
+                    best = (length, merchant_index)
+                candidate = dict_link[candidate]
+
+        return self.merchants[best[1]] if best else None
+
+    def match(self, descriptor):
+        """Return the merchant for a descriptor, or None"""
+        return self._cached_lookup(descriptor)
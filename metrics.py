@@ -0,0 +1,156 @@
+"""Prometheus metrics, request timing, per-stage spans and structured logging for app.py and app_modern.py.
+
+Each process keeps its own metrics. Under a preforking server such as gunicorn, set
+PROMETHEUS_MULTIPROC_DIR to an empty directory before the workers start: they then write
+their values there and /metrics, whichever worker serves it, reports the sum over all of them.
+"""
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+logger = logging.getLogger('metrics')
+
+# Libraries that log every PDF operator or connection at DEBUG
+QUIET_LOGGERS = ['pdfminer', 'PIL', 'urllib3']
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route template',
+    ['method', 'route', 'status']
+)
+STAGE_LATENCY = Histogram(
+    'upload_stage_duration_seconds', 'Time spent in each statement processing stage',
+    ['stage'], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+STAGE_FAILURES = Counter('upload_stage_failures_total', 'Stages that raised', ['stage'])
+UPLOADS = Counter('statement_uploads_total', 'Processed statement uploads by outcome', ['status'])
+# Summed over the live workers when PROMETHEUS_MULTIPROC_DIR is set
+QUEUE_DEPTH = Gauge('upload_queue_depth', 'Upload jobs queued or running', multiprocess_mode='livesum')
+LLM_INPUT_TOKENS = Counter(
+    'llm_input_tokens_total', 'Estimated tokens of statement text before (extracted) and after (sent) compaction', ['stage']
+)
+USER_CACHE = Counter('user_cache_lookups_total', 'Flask-Login user loads by cache result', ['result'])
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, with the fields passed as extra={'fields': {...}}"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with the structured fields appended as key=value"""
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+class SampleFilter(logging.Filter):
+    """Keep every warning and error but only `rate` of the records below WARNING"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+def configure_logging():
+    """Set up the root logger from LOG_LEVEL, LOG_FORMAT ('json' or 'text') and LOG_SAMPLE_RATE.
+
+    Leaves logging alone if something (gunicorn, a test runner) already installed handlers.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    if os.getenv('LOG_FORMAT', 'json') == 'json':
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(TextFormatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    handler.addFilter(SampleFilter(float(os.getenv('LOG_SAMPLE_RATE', 1.0))))
+    root.addHandler(handler)
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(root.level, logging.WARNING))
+
+
+@contextmanager
+def span(stage, **fields):
+    """Time a block into STAGE_LATENCY and log it; callers may add fields to the yielded dict"""
+    start = time.perf_counter()
+    try:
+        yield fields
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(stage).observe(elapsed)
+        STAGE_FAILURES.labels(stage).inc()
+        logger.warning('%s failed', stage, extra={'fields': dict(
+            fields, stage=stage, duration_ms=round(elapsed * 1000, 2), error=str(e))})
+        raise
+    elapsed = time.perf_counter() - start
+    STAGE_LATENCY.labels(stage).observe(elapsed)
+    logger.debug('%s finished', stage, extra={'fields': dict(
+        fields, stage=stage, duration_ms=round(elapsed * 1000, 2))})
+
+
+def metrics_registry():
+    """The registry /metrics reports: this process's, or every worker's under PROMETHEUS_MULTIPROC_DIR"""
+    if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def init_metrics(app):
+    """Time every request and serve Prometheus metrics at /metrics.
+
+    Streaming responses are timed to their headers, not to the end of the stream.
+    """
+    registry = metrics_registry()
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        # The route template keeps label cardinality bounded; unmatched paths share one label
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(request.method, route, response.status_code).observe(elapsed)
+        logger.info('request', extra={'fields': {
+            'method': request.method, 'route': route, 'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 2)
+        }})
+        return response
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,58 @@
+"""Upload job state and per-user unique subscription names
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 16:51:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('statement_upload', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('result', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('completed_at', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE statement_upload SET status = CASE WHEN processed THEN 'done' ELSE 'failed' END")
+
+    with op.batch_alter_table('subscription', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('name_key', sa.String(length=100), nullable=True))
+
+    # Backfill with the same normalisation as normalize_name(). Rows that already
+    # duplicate an earlier one keep a suffixed key rather than being deleted.
+    conn = op.get_bind()
+    seen = set()
+    rows = conn.execute(sa.text('SELECT id, user_id, name FROM subscription ORDER BY id')).fetchall()
+    for id, user_id, name in rows:
+        name_key = ' '.join(name.lower().split())
+        if (user_id, name_key) in seen:
+            name_key = f'{name_key}#{id}'
+        seen.add((user_id, name_key))
+        conn.execute(sa.text('UPDATE subscription SET name_key = :name_key WHERE id = :id'),
+                     {'name_key': name_key, 'id': id})
+
+    with op.batch_alter_table('subscription', schema=None) as batch_op:
+        batch_op.alter_column('name_key', existing_type=sa.String(length=100), nullable=False)
+        batch_op.create_unique_constraint('uq_subscription_user_name', ['user_id', 'name_key'])
+
+
+def downgrade():
+    with op.batch_alter_table('subscription', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_subscription_user_name', type_='unique')
+        batch_op.drop_column('name_key')
+
+    with op.batch_alter_table('statement_upload', schema=None) as batch_op:
+        batch_op.drop_column('completed_at')
+        batch_op.drop_column('error')
+        batch_op.drop_column('result')
+        batch_op.drop_column('status')
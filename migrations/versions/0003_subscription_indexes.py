@@ -0,0 +1,35 @@
+"""Indexes for per-user subscription, analytics and upload queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 16:52:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('subscription', schema=None) as batch_op:
+        batch_op.create_index('ix_subscription_user_active', ['user_id', 'is_active'], unique=False)
+        batch_op.create_index('ix_subscription_user_next_billing', ['user_id', 'next_billing_date'], unique=False)
+        batch_op.create_index('ix_subscription_next_billing_date', ['next_billing_date'], unique=False)
+
+    with op.batch_alter_table('statement_upload', schema=None) as batch_op:
+        batch_op.create_index('ix_statement_upload_user_uploaded', ['user_id', 'uploaded_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('statement_upload', schema=None) as batch_op:
+        batch_op.drop_index('ix_statement_upload_user_uploaded')
+
+    with op.batch_alter_table('subscription', schema=None) as batch_op:
+        batch_op.drop_index('ix_subscription_next_billing_date')
+        batch_op.drop_index('ix_subscription_user_next_billing')
+        batch_op.drop_index('ix_subscription_user_active')
@@ -0,0 +1,33 @@
+"""Per-user analytics totals maintained alongside subscription writes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:53:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_analytics',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_monthly', sa.Float(), nullable=False),
+    sa.Column('subscription_count', sa.Integer(), nullable=False),
+    sa.Column('by_category', sa.Text(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('user_analytics')
@@ -0,0 +1,42 @@
+"""Transaction ledger for cross-statement recurrence detection
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:57:50.395593
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('transaction',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('upload_id', sa.Integer(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('descriptor', sa.String(length=255), nullable=False),
+    sa.Column('merchant', sa.String(length=100), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['statement_upload.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'date', 'descriptor', 'amount', name='uq_transaction_user_entry')
+    )
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.create_index('ix_transaction_user_merchant_date', ['user_id', 'merchant', 'date'], unique=False)
+
+
+
+def downgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_index('ix_transaction_user_merchant_date')
+
+    op.drop_table('transaction')
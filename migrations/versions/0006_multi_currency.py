@@ -0,0 +1,36 @@
+"""Per-user base currency; analytics totals kept per currency
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 17:02:13.843677
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('base_currency', sa.String(length=3), server_default='USD', nullable=False))
+
+    # by_category changes shape to {category: {currency: [total, count]}}; the app rebuilds
+    # missing rows from the subscriptions table on first use
+    op.execute('DELETE FROM user_analytics')
+    with op.batch_alter_table('user_analytics', schema=None) as batch_op:
+        batch_op.drop_column('total_monthly')
+
+
+def downgrade():
+    op.execute('DELETE FROM user_analytics')
+    with op.batch_alter_table('user_analytics', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_monthly', sa.Float(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('base_currency')
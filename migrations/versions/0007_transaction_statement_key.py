@@ -0,0 +1,44 @@
+"""Deduplicate ledger lines by statement and position instead of by value
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 19:12:40.218817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('statement_sha256', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('line_index', sa.Integer(), nullable=True))
+
+    # Lines stored so far have no statement to key on, so each keeps a key of its own
+    op.execute("UPDATE \"transaction\" SET statement_sha256 = 'legacy', line_index = id")
+
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.alter_column('statement_sha256', existing_type=sa.String(length=64), nullable=False)
+        batch_op.alter_column('line_index', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_constraint('uq_transaction_user_entry', type_='unique')
+        batch_op.create_unique_constraint('uq_transaction_user_statement_line', ['user_id', 'statement_sha256', 'line_index'])
+
+
+def downgrade():
+    # The old key collapses identical charges, so keep only the first of each
+    op.execute(
+        'DELETE FROM "transaction" WHERE id NOT IN '
+        '(SELECT MIN(id) FROM "transaction" GROUP BY user_id, date, descriptor, amount)'
+    )
+    with op.batch_alter_table('transaction', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_transaction_user_statement_line', type_='unique')
+        batch_op.create_unique_constraint('uq_transaction_user_entry', ['user_id', 'date', 'descriptor', 'amount'])
+        batch_op.drop_column('line_index')
+        batch_op.drop_column('statement_sha256')
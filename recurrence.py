@@ -0,0 +1,142 @@
+"""Vectorised recurrence detection over a user's whole transaction ledger.
+
+Charges are grouped per merchant and every group is measured in one pass of
+array operations: the median gap between charges picks the billing cycle,
+and the spread of gaps and amounts decides whether the charge is regular
+enough to be a subscription. Cost grows with the number of transactions,
+not with the number of merchants.
+"""
+from datetime import date
+
+import numpy as np
+
+from detector import CYCLES
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# A merchant needs at least this many charges before its gaps mean anything
+MIN_CHARGES = 3
+# Largest gap spread (median absolute deviation / median gap) still counted as regular
+MAX_GAP_DEVIATION = 0.25
+# Largest amount spread (coefficient of variation) still counted as the same plan
+MAX_AMOUNT_VARIATION = 0.2
+
+RESULT_FIELDS = ['merchant', 'cycle', 'charges', 'median_gap', 'gap_deviation', 'mean_amount',
+                 'amount_variation', 'last_date', 'confidence']
+
+
+def _group_medians(group, values, counts):
+    """Median of `values` within each group; `group` must be sorted and every count non-zero"""
+    order = np.lexsort((values, group))
+    ranked = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    low = ranked[starts + (counts - 1) // 2]
+    high = ranked[starts + counts // 2]
+    return (low + high) / 2
+
+
+def _to_days(dates):
+    """Days since 1970-01-01 as int64, from a datetime64 array or a sequence of date objects"""
+    if isinstance(dates, np.ndarray) and np.issubdtype(dates.dtype, np.datetime64):
+        return dates.astype('datetime64[D]').astype(np.int64)
+    # NumPy parses date objects one at a time and slowly; ordinals are much cheaper
+    return np.fromiter((d.toordinal() for d in dates), dtype=np.int64, count=len(dates)) - EPOCH_ORDINAL
+
+
+def measure(merchants, dates, amounts):
+    """Per-merchant statistics for parallel arrays of merchant keys, dates and amounts.
+
+    Returns a dict of equal-length arrays, one entry per merchant with at least two charges.
+    """
+    merchants = np.asarray(merchants)
+    days = _to_days(dates)
+    amounts = np.abs(np.asarray(amounts, dtype=np.float64))
+    if len(days) == 0:
+        return {field: np.array([]) for field in RESULT_FIELDS}
+
+    names, codes = np.unique(merchants, return_inverse=True)
+    order = np.lexsort((days, codes))
+    codes, days, amounts = codes[order], days[order], amounts[order]
+
+    # Gaps between consecutive charges of the same merchant
+    same = codes[1:] == codes[:-1]
+    gap_group = codes[1:][same]
+    gaps = (days[1:] - days[:-1])[same].astype(np.float64)
+
+    charges = np.bincount(codes, minlength=len(names))
+    gap_counts = np.bincount(gap_group, minlength=len(names))
+    measured = gap_counts > 0
+
+    # Drop merchants charged only once so every remaining group has gaps
+    keep = measured[gap_group]
+    gap_group, gaps = gap_group[keep], gaps[keep]
+    remap = np.cumsum(measured) - 1
+    dense_group = remap[gap_group]
+    dense_counts = gap_counts[measured]
+
+    median_gap = _group_medians(dense_group, gaps, dense_counts)
+    gap_deviation = _group_medians(dense_group, np.abs(gaps - median_gap[dense_group]), dense_counts)
+
+    amount_sum = np.bincount(codes, weights=amounts, minlength=len(names))[measured]
+    amount_sq = np.bincount(codes, weights=amounts * amounts, minlength=len(names))[measured]
+    counts = charges[measured]
+    mean_amount = amount_sum / counts
+    variance = np.maximum(amount_sq / counts - mean_amount ** 2, 0)
+    amount_variation = np.divide(np.sqrt(variance), mean_amount, out=np.zeros_like(mean_amount),
+                                 where=mean_amount > 0)
+
+    # Groups are contiguous and date-sorted, so each group's last element is its latest charge
+    last_index = np.cumsum(charges)[measured] - 1
+
+    cycle_names = np.array([name for _, _, name in CYCLES] + [None], dtype=object)
+    cycle_index = np.select(
+        [(median_gap >= low) & (median_gap <= high) for low, high, _ in CYCLES],
+        np.arange(len(CYCLES)),
+        default=len(CYCLES)
+    )
+
+    relative_gap_deviation = gap_deviation / np.maximum(median_gap, 1)
+    regular = (
+        (counts >= MIN_CHARGES)
+        & (relative_gap_deviation <= MAX_GAP_DEVIATION)
+        & (amount_variation <= MAX_AMOUNT_VARIATION)
+        & (cycle_index < len(CYCLES))
+    )
+    # More charges and tighter spreads give more confidence, capped below catalog matches
+    confidence = np.where(
+        regular,
+        np.clip(0.6 + 0.05 * counts - relative_gap_deviation - amount_variation, 0.5, 0.9),
+        0.0
+    )
+
+    return {
+        'merchant': names[measured],
+        'cycle': cycle_names[cycle_index],
+        'charges': counts,
+        'median_gap': median_gap,
+        'gap_deviation': gap_deviation,
+        'mean_amount': mean_amount,
+        'amount_variation': amount_variation,
+        'last_date': days[last_index].astype('datetime64[D]'),
+        'confidence': confidence
+    }
+
+
+def find_recurring(merchants, dates, amounts):
+    """Merchants whose charges recur on a regular cycle, most confident first"""
+    stats = measure(merchants, dates, amounts)
+    recurring = np.flatnonzero(stats['confidence'] > 0)
+    recurring = recurring[np.argsort(-stats['confidence'][recurring], kind='stable')]
+    return [
+        {
+            'merchant': str(stats['merchant'][i]),
+            'cycle': stats['cycle'][i],
+            'charges': int(stats['charges'][i]),
+            'median_gap_days': float(stats['median_gap'][i]),
+            'amount': round(float(stats['mean_amount'][i]), 2),
+            'amount_variation': round(float(stats['amount_variation'][i]), 3),
+            'last_date': str(stats['last_date'][i]),
+            'confidence': round(float(stats['confidence'][i]), 2)
+        }
+        for i in recurring
+    ]
@@ -0,0 +1,47 @@
+"""Uploaded files buffered in memory, spilling to an anonymous temp file only when large."""
+import io
+from tempfile import SpooledTemporaryFile
+
+from flask import Request, current_app
+
+PDF_MAGIC = b'%PDF-'
+
+
+class SpooledRequest(Request):
+    """Buffer each uploaded file in memory up to UPLOAD_SPOOL_MAX_BYTES.
+
+    Larger files roll over to an unnamed temporary file, so concurrent uploads
+    never share a path and nothing is left behind once the buffer is closed.
+    Flask already enforces MAX_CONTENT_LENGTH while the body is read.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledTemporaryFile(
+            max_size=current_app.config['UPLOAD_SPOOL_MAX_BYTES'],
+            mode='rb+',
+            dir=current_app.config['UPLOAD_SPOOL_DIR']
+        )
+
+
+def detach_upload(file):
+    """Take ownership of an uploaded file's buffer so it outlives the request; the caller must close it"""
+    stream = file.stream
+    # Flask closes request files when the request ends; leave it an empty stand-in
+    file.stream = io.BytesIO()
+    stream.seek(0)
+    return stream
+
+
+def looks_like_pdf(stream):
+    start = stream.read(len(PDF_MAGIC))
+    stream.seek(0)
+    return start == PDF_MAGIC
+
+
+def read_all(stream):
+    """Read a detached upload and release its buffer"""
+    try:
+        stream.seek(0)
+        return stream.read()
+    finally:
+        stream.close()
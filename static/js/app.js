@@ -153,7 +153,7 @@ function renderSubscriptions() {
             </div>
             <div class="flex items-center gap-4">
                 <div class="text-right">
-                    <p class="text-2xl font-bold text-primary">$${sub.amount.toFixed(2)}</p>
+                    <p class="text-2xl font-bold text-primary">${formatMoney(sub.amount, sub.currency)}</p>
                     <p class="text-sm text-gray-600">/${sub.billing_cycle}</p>
                 </div>
                 <div class="flex gap-2">
@@ -170,10 +170,10 @@ function renderSubscriptions() {
 }
 
 function updateAnalytics() {
-    document.getElementById('monthlyTotal').textContent = `$${analytics.total_monthly || 0}`;
-    document.getElementById('yearlyTotal').textContent = `$${analytics.total_yearly || 0}`;
+    document.getElementById('monthlyTotal').textContent = formatMoney(analytics.total_monthly || 0, analytics.currency);
+    document.getElementById('yearlyTotal').textContent = formatMoney(analytics.total_yearly || 0, analytics.currency);
     document.getElementById('subCount').textContent = analytics.subscription_count || 0;
-    document.getElementById('avgCost').textContent = `$${analytics.average_subscription || 0}`;
+    document.getElementById('avgCost').textContent = formatMoney(analytics.average_subscription || 0, analytics.currency);
     
     // Update category chart
     if (analytics.by_category) {
@@ -218,7 +218,7 @@ function updateCategoryChart(byCategory) {
                 tooltip: {
                     callbacks: {
                         label: function(context) {
-                            return context.label + ': $' + context.parsed.toFixed(2);
+                            return context.label + ': ' + formatMoney(context.parsed, analytics.currency);
                         }
                     }
                 }
@@ -237,7 +237,7 @@ function renderCategoryBreakdown(byCategory) {
             <div class="flex justify-between items-center">
                 <span class="capitalize">${category}</span>
                 <div class="flex items-center gap-2">
-                    <span class="font-semibold">$${amount.toFixed(2)}</span>
+                    <span class="font-semibold">${formatMoney(amount, analytics.currency)}</span>
                     <span class="text-sm text-gray-600">${percentage}%</span>
                 </div>
             </div>
@@ -291,34 +291,59 @@ function handleFileSelect(e) {
 }
 
 async function handleFiles(files) {
+    files = Array.from(files);
     if (files.length === 0) return;
     
-    const file = files[0];
-    if (!file.name.toLowerCase().endsWith('.pdf')) {
-        showToast('Please upload a PDF file', 'error');
+    if (files.some(file => !file.name.toLowerCase().endsWith('.pdf'))) {
+        showToast('Please upload PDF files only', 'error');
         return;
     }
     
     const formData = new FormData();
-    formData.append('file', file);
+    files.forEach(file => formData.append('files', file));
     
     document.getElementById('uploadProgress').classList.remove('hidden');
     document.getElementById('uploadResults').classList.add('hidden');
+    const statusList = document.getElementById('uploadFileStatus');
+    statusList.innerHTML = '';
     
     try {
-        const response = await fetch('/api/upload', {
+        const response = await fetch('/api/upload/batch', {
             method: 'POST',
             body: formData,
             credentials: 'include'
         });
         
-        const result = await response.json();
+        if (!response.ok) {
+            const error = await response.json();
+            showToast(error.error || 'Upload failed', 'error');
+            return;
+        }
         
-        if (response.ok) {
-            showUploadResults(result);
+        let complete = null;
+        await readEventStream(response, (event, data) => {
+            if (event === 'queued') {
+                data.jobs.forEach(job => renderUploadStatus(job.job_id, job.filename, 'queued'));
+            } else if (event === 'progress') {
+                renderUploadStatus(data.job_id, data.filename, data.stage, data.error);
+            } else if (event === 'complete') {
+                complete = data;
+            }
+        });
+        
+        if (!complete) {
+            showToast('Upload interrupted; check back shortly for results', 'error');
+            return;
+        }
+        if (complete.failed.length > 0) {
+            showToast(`${complete.failed.length} of ${complete.files} statements could not be processed`, 'error');
+        }
+        if (complete.pending.length > 0) {
+            showToast(`${complete.pending.length} of ${complete.files} statements are still processing; check back shortly`, 'error');
+        }
+        if (complete.failed.length + complete.pending.length < complete.files) {
+            showUploadResults(complete.result);
             await loadDashboard(); // Reload data
-        } else {
-            showToast(result.error || 'Upload failed', 'error');
         }
     } catch (error) {
         console.error('Upload error:', error);
@@ -328,6 +353,56 @@ async function handleFiles(files) {
     }
 }
 
+// Server-Sent Events over fetch, since EventSource cannot POST files
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            const data = [];
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data.push(line.slice(6));
+            });
+            if (data.length > 0) onEvent(event, JSON.parse(data.join('\n')));
+        }
+    }
+}
+
+const UPLOAD_STAGES = {
+    queued: 'Waiting...',
+    extracting: 'Reading PDF...',
+    analysing: 'Detecting subscriptions...',
+    saving: 'Saving...',
+    done: 'Done',
+    failed: 'Failed'
+};
+
+function renderUploadStatus(jobId, filename, stage, error) {
+    let row = document.getElementById(`upload-job-${jobId}`);
+    if (!row) {
+        row = document.createElement('li');
+        row.id = `upload-job-${jobId}`;
+        row.className = 'flex justify-between text-sm';
+        row.innerHTML = '<span class="truncate mr-2"></span><span class="text-gray-600"></span>';
+        document.getElementById('uploadFileStatus').appendChild(row);
+    }
+    row.children[0].textContent = filename;
+    row.children[1].textContent = error ? `${UPLOAD_STAGES[stage]}: ${error}` : UPLOAD_STAGES[stage];
+    row.children[1].className = stage === 'failed' ? 'text-red-600' : stage === 'done' ? 'text-green-600' : 'text-gray-600';
+}
+
 function showUploadResults(result) {
     const container = document.getElementById('uploadResults');
     
@@ -462,6 +537,10 @@ function closeModal(modalId) {
 }
 
 // Utility functions
+function formatMoney(amount, currency = 'USD') {
+    return new Intl.NumberFormat(undefined, { style: 'currency', currency: currency || 'USD' }).format(amount);
+}
+
 function formatDate(dateString) {
     const date = new Date(dateString);
     return date.toLocaleDateString('en-US', { month: 'short', day: 'numeric', year: 'numeric' });
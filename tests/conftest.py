@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LLM_BACKEND', 'stub')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+
+@pytest.fixture
+def app(tmp_path):
+    from app_modern import create_app, db, User
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RESULT_CACHE_PATH': str(tmp_path / 'results.sqlite3'),
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add(User(email='user@example.com'))
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """Test client logged in as the user created by `app`"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+    return client
@@ -0,0 +1,31 @@
+from compaction import compact
+from llm import split_into_chunks
+
+
+def page(number, rows):
+    lines = ['ACME BANK', f'Statement page {number}']
+    lines += [f'2024-0{number}-{day:02d} MERCHANT {number}-{day} {day}.99' for day in range(1, rows + 1)]
+    lines += ['Questions? Call 0800 000 000', f'Page {number} of 3']
+    return '\n'.join(lines) + '\n'
+
+
+TEXT = '\f'.join(page(number, rows=10) for number in (1, 2, 3))
+
+
+def test_page_breaks_survive_compaction():
+    compacted = compact(TEXT)
+
+    assert compacted.count('\f') == 2
+    pages = compacted.split('\f')
+    assert all(p.strip().splitlines()[0].startswith(f'2024-0{n}-01') for n, p in zip((1, 2, 3), pages))
+    assert 'ACME BANK' not in compacted
+    assert 'Page 2 of 3' not in compacted
+
+
+def test_compacted_chunks_start_at_page_breaks():
+    compacted = compact(TEXT)
+    chunks = split_into_chunks(compacted, max_chars=len(compacted.split('\f')[0]) + 120)
+
+    assert len(chunks) == 3
+    assert [chunk.lstrip('\f').split()[0] for chunk in chunks] == ['2024-01-01', '2024-02-01', '2024-03-01']
+    assert all(chunk.startswith('\f') for chunk in chunks[1:])
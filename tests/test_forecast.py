@@ -0,0 +1,45 @@
+from datetime import date
+
+import numpy as np
+
+from forecast import expand, forecast
+
+
+def billing_dates(anchor, cycle, start, end):
+    _, dates = expand([anchor], [cycle], start, end)
+    return sorted(str(d) for d in dates)
+
+
+def test_month_end_anchor_is_clamped_to_shorter_months():
+    assert billing_dates('2024-01-31', 'monthly', '2024-01-01', '2024-04-30') == [
+        '2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30'
+    ]
+    assert billing_dates('2023-01-31', 'monthly', '2023-02-01', '2023-02-28') == ['2023-02-28']
+
+
+def test_leap_day_yearly_renews_on_the_last_day_of_february():
+    assert billing_dates('2024-02-29', 'yearly', '2024-01-01', '2028-12-31') == [
+        '2024-02-29', '2025-02-28', '2026-02-28', '2027-02-28', '2028-02-29'
+    ]
+
+
+def test_weekly_starts_at_the_anchor_not_before_it():
+    assert billing_dates('2024-03-06', 'weekly', '2024-03-01', '2024-03-20') == [
+        '2024-03-06', '2024-03-13', '2024-03-20'
+    ]
+
+
+def test_unknown_cycles_are_billed_monthly():
+    assert billing_dates('2024-01-15', 'fortnightly', '2024-01-01', '2024-02-29') == ['2024-01-15', '2024-02-15']
+
+
+def test_totals_by_day_month_and_category():
+    result = forecast(
+        np.array(['2024-01-31', '2024-01-10'], dtype='datetime64[D]'), ['monthly', 'weekly'], [10.0, 2.5],
+        ['streaming', 'other'], date(2024, 2, 1), date(2024, 2, 29)
+    )
+    assert result['charge_count'] == 1 + 4
+    assert result['total'] == 20.0
+    assert result['by_day']['2024-02-29'] == 10.0
+    assert result['by_month'] == {'2024-02': 20.0}
+    assert result['by_category'] == {'streaming': 10.0, 'other': 10.0}
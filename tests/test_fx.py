@@ -0,0 +1,38 @@
+import math
+
+import pytest
+
+from fx import FXTable, UnknownCurrency, convert_and_sum
+
+TABLE = FXTable({'USD': 1.0, 'EUR': 0.8, 'JPY': 150.0})
+
+
+def test_rates_go_through_the_base_currency():
+    assert TABLE.rate('EUR', 'JPY') == pytest.approx(187.5)
+    assert TABLE.rate('usd', ' eur ') == pytest.approx(0.8)
+
+
+def test_convert_uses_each_source_currency():
+    converted = TABLE.convert([10, 8, 1500], ['USD', 'EUR', 'JPY'], 'EUR')
+    assert converted.tolist() == pytest.approx([8.0, 8.0, 8.0])
+
+
+def test_unknown_currencies():
+    with pytest.raises(UnknownCurrency):
+        TABLE.rate('USD', 'XYZ')
+    with pytest.raises(UnknownCurrency):
+        TABLE.convert([1], ['USD'], 'XYZ')
+
+    amounts = TABLE.convert([1, 1], ['XYZ', 'USD'], 'USD')
+    assert math.isnan(amounts[0]) and amounts[1] == 1.0
+    assert TABLE.convert([1], ['XYZ'], 'USD', missing=0.0).tolist() == [0.0]
+    assert 'XYZ' not in TABLE and 'eur' in TABLE
+
+
+def test_convert_and_sum_leaves_out_unknown_currencies():
+    groups, total, unconverted = convert_and_sum(
+        ['streaming', 'streaming', 'other'], [10, 8, 5], ['USD', 'EUR', 'XYZ'], 'USD', table=TABLE
+    )
+    assert groups == {'other': 0.0, 'streaming': pytest.approx(20.0)}
+    assert total == pytest.approx(20.0)
+    assert unconverted == ['XYZ']
@@ -0,0 +1,41 @@
+import io
+import logging
+import random
+
+import pdfplumber
+
+from create_test_pdf import draw_statement, plan_statement
+from layout import extract_page_range_rows, extract_transactions
+
+
+def statement_pdf(pages):
+    transactions, _ = plan_statement(random.Random(5), pages=pages, density=20)
+    pdf = io.BytesIO()
+    draw_statement(pdf, transactions, density=20)
+    return pdf.getvalue(), transactions
+
+
+def test_rows_match_the_drawn_statement():
+    pdf, transactions = statement_pdf(pages=1)
+    columns = extract_transactions(pdf, workers=1)
+    assert len(columns) == len(transactions)
+
+
+def test_page_that_cannot_be_loaded_is_skipped(monkeypatch, caplog):
+    pdf, _ = statement_pdf(pages=2)
+    complete = extract_page_range_rows(pdf, 0, 2)
+
+    class BrokenFirstPage(list):
+        def __getitem__(self, i):
+            if i == 0:
+                raise ValueError('broken page object')
+            return super().__getitem__(i)
+
+    pages = pdfplumber.PDF.pages
+    monkeypatch.setattr(pdfplumber.PDF, 'pages', property(lambda pdf: BrokenFirstPage(pages.fget(pdf))))
+    with caplog.at_level(logging.WARNING, logger='layout'):
+        dates, descriptors, amounts, _ = extract_page_range_rows(pdf, 0, 2)
+
+    assert 'pdfplumber failed on page 1' in caplog.text
+    assert 0 < len(descriptors) < len(complete[1])
+    assert descriptors == complete[1][-len(descriptors):]
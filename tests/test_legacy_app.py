@@ -0,0 +1,51 @@
+import io
+import os
+import random
+import threading
+
+import pytest
+
+import app as legacy
+from cache import ResultCache
+from create_test_pdf import draw_statement, plan_statement
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / 'results.sqlite3'))
+    monkeypatch.setattr(legacy, 'get_result_cache', lambda: cache)
+    monkeypatch.chdir(tmp_path)
+    return legacy.app.test_client()
+
+
+def statement_pdf(seed):
+    transactions, _ = plan_statement(random.Random(seed), pages=1, density=30)
+    pdf = io.BytesIO()
+    draw_statement(pdf, transactions, density=30)
+    return pdf.getvalue()
+
+
+def upload(client, pdf):
+    return client.post('/upload', data={'file': (io.BytesIO(pdf), 'statement.pdf')}).get_json()
+
+
+def test_concurrent_uploads_with_the_same_name_stay_separate(client, tmp_path):
+    pdfs = [statement_pdf(seed) for seed in (1, 2)]
+    expected = [upload(client, pdf) for pdf in pdfs]
+    assert expected[0] != expected[1]
+
+    results = [None, None]
+    barrier = threading.Barrier(2)
+
+    def send(i):
+        barrier.wait()
+        results[i] = upload(legacy.app.test_client(), pdfs[i])
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == expected
+    assert not os.path.exists(tmp_path / 'uploads')
@@ -0,0 +1,31 @@
+import pytest
+
+from merchants import DEFAULT_PATH, MerchantMatcher, load_merchants
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    return MerchantMatcher(load_merchants(DEFAULT_PATH))
+
+
+@pytest.mark.parametrize('descriptor, name', [
+    ('APPLE.COM/BILL', 'Apple Services'),
+    ('HULU 877-824-4858', 'Hulu'),
+    ('XBOX LIVE', 'Xbox Game Pass'),
+    ('SPOTIFY P0A1B2', 'Spotify'),
+    ('NETFLIX.COM*866', 'Netflix'),
+    ('SPOTIFY', 'Spotify'),
+])
+def test_matches_known_merchants(matcher, descriptor, name):
+    assert matcher.match(descriptor)['name'] == name
+
+
+@pytest.mark.parametrize('descriptor', [
+    'APPLEBEES #1234',
+    'HULUSI KEBAB',
+    'XBOXING CLUB',
+    'SPOTIFYX',
+    'MYNETFLIX',
+])
+def test_pattern_must_be_a_whole_word(matcher, descriptor):
+    assert matcher.match(descriptor) is None
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import threading
+
+from jobs import JobQueue
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = '''
+from metrics import UPLOADS
+UPLOADS.labels('done').inc()
+'''
+
+SCRAPE = '''
+from flask import Flask
+from metrics import init_metrics
+app = Flask(__name__)
+init_metrics(app)
+print(app.test_client().get('/metrics').get_data(as_text=True))
+'''
+
+
+def run(code, env):
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True,
+                          capture_output=True, text=True).stdout
+
+
+def test_metrics_sum_over_worker_processes(tmp_path):
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    run(WORKER, env)
+    run(WORKER, env)
+
+    assert 'statement_uploads_total{status="done"} 2.0' in run(SCRAPE, env)
+
+
+def test_job_queue_reports_depth_changes():
+    depths = []
+    release = threading.Event()
+    queue = JobQueue(max_workers=1, max_depth=4, on_depth_change=depths.append)
+
+    futures = queue.submit_all(release.wait, [(), ()])
+    release.set()
+    for future in futures:
+        future.result()
+    queue.shutdown()
+
+    assert depths == [2, 1, 0]
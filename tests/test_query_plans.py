@@ -0,0 +1,74 @@
+"""The hot per-user queries must search an index, not scan a table (see benchmarks/bench_query_plans.py)."""
+import random
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert, select, text
+
+from app_modern import db, Subscription, Transaction
+
+USERS = 100
+USER_ID = 42
+
+
+@pytest.fixture
+def seeded(app):
+    rng = random.Random(8)
+    today = date.today()
+    with app.app_context():
+        db.session.execute(insert(db.metadata.tables['user']), [
+            {'id': i, 'email': f'user{i}@example.com'} for i in range(2, USERS + 1)
+        ])
+        db.session.execute(insert(Subscription), [
+            {'user_id': i % USERS + 1, 'name': f'Service {i}', 'name_key': f'service {i}',
+             'amount': rng.uniform(1, 60), 'category': rng.choice(['streaming', 'software', 'other']),
+             'next_billing_date': today + timedelta(days=rng.randint(0, 365)), 'is_active': rng.random() < 0.8}
+            for i in range(5000)
+        ])
+        db.session.execute(insert(Transaction), [
+            {'user_id': i % USERS + 1, 'statement_sha256': f'{i % 20:064x}', 'line_index': i,
+             'date': today - timedelta(days=i % 365), 'descriptor': f'MERCHANT {i % 50}',
+             'merchant': f'merchant {i % 50}', 'amount': rng.uniform(1, 60)}
+            for i in range(5000)
+        ])
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+        yield
+
+
+def plan(statement):
+    sql = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    return [row[3] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+QUERIES = {
+    'list subscriptions': (
+        select(Subscription.id, Subscription.name).where(Subscription.user_id == USER_ID), None
+    ),
+    'list subscriptions renewing soon': (
+        select(Subscription.id).where(Subscription.user_id == USER_ID, Subscription.next_billing_date.between(
+            date.today(), date.today() + timedelta(days=7))),
+        'ix_subscription_user_next_billing'
+    ),
+    'analytics and forecast': (
+        select(Subscription.category, Subscription.amount)
+        .filter_by(user_id=USER_ID, is_active=True),
+        'ix_subscription_user_active'
+    ),
+    'recurring transactions': (
+        select(Transaction.merchant, Transaction.date, Transaction.amount)
+        .where(Transaction.user_id == USER_ID, Transaction.merchant != ''),
+        'ix_transaction_user_merchant_date'
+    ),
+}
+
+
+@pytest.mark.parametrize('name', QUERIES)
+def test_query_searches_an_index(seeded, name):
+    statement, index = QUERIES[name]
+    steps = plan(statement)
+
+    assert not any(step.startswith('SCAN') for step in steps), steps
+    assert any(step.startswith('SEARCH') and ('INDEX ix_' in step or 'INDEX uq_' in step) for step in steps), steps
+    if index:
+        assert any(index in step for step in steps), steps
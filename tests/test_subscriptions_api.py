@@ -0,0 +1,215 @@
+import base64
+import json
+
+import pytest
+
+
+def cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def test_cursor_pages_through_subscriptions(client):
+    for i in range(5):
+        client.post('/api/subscriptions', json={'name': f'Service {i}', 'amount': 5 + i})
+
+    first = client.get('/api/subscriptions?limit=3')
+    second = client.get(f"/api/subscriptions?limit=3&cursor={first.headers['X-Next-Cursor']}")
+
+    names = [s['name'] for s in first.get_json() + second.get_json()]
+    assert names == [f'Service {i}' for i in range(5)]
+    assert 'X-Next-Cursor' not in second.headers
+
+
+@pytest.mark.parametrize('value', [
+    'MQ',                                   # the JSON number 1
+    cursor([False, 'x']),                   # too short
+    cursor({'is_null': False}),             # not a list
+    cursor([False, 'x', 'not an id']),      # id is not an integer
+    cursor([False, ['x'], 3]),              # value is not a scalar
+    'not base64!',
+])
+def test_malformed_cursor_is_rejected(client, value):
+    response = client.get(f'/api/subscriptions?cursor={value}')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
+
+
+def test_date_sort_rejects_non_string_cursor_value(client):
+    response = client.get(f"/api/subscriptions?sort=next_billing_date&cursor={cursor([False, 5, 1])}")
+    assert response.status_code == 400
+
+
+def rounded(by_category):
+    return {(category, currency): (round(total, 6), count)
+            for category, per_currency in by_category.items() for currency, (total, count) in per_currency.items()}
+
+
+def assert_analytics_match_rebuild(app, user_id=1):
+    """The incrementally maintained totals equal what rebuild_analytics would store"""
+    from app_modern import db, compute_analytics, UserAnalytics
+
+    with app.app_context():
+        stored = db.session.get(UserAnalytics, user_id)
+        count, by_category = compute_analytics(user_id)
+        assert (stored.subscription_count, rounded(json.loads(stored.by_category))) == (count, rounded(by_category))
+
+
+def test_incremental_analytics_match_a_rebuild(app, client):
+    ids = [client.post('/api/subscriptions', json=data).get_json()['id'] for data in [
+        {'name': 'Netflix', 'amount': 15.49},
+        {'name': 'Spotify', 'amount': 9.99, 'currency': 'EUR'},
+        {'name': 'Dropbox', 'amount': 119.88, 'billing_cycle': 'yearly'},
+        {'name': 'Gym', 'amount': 12, 'billing_cycle': 'weekly', 'currency': 'GBP'},
+    ]]
+    assert_analytics_match_rebuild(app)
+
+    for change in [
+        {'amount': 17.99},
+        {'billing_cycle': 'yearly'},
+        {'currency': 'JPY'},
+        {'category': 'software'},
+        {'is_active': False},
+        {'is_active': True, 'billing_cycle': 'weekly', 'currency': 'USD'},
+    ]:
+        assert client.put(f'/api/subscriptions/{ids[0]}', json=change).status_code == 200
+        assert_analytics_match_rebuild(app)
+
+    assert client.delete(f'/api/subscriptions/{ids[1]}').status_code == 200
+    assert_analytics_match_rebuild(app)
+
+
+def test_upload_analytics_match_a_rebuild(app, client):
+    import io
+    import random
+
+    from app_modern import db, process_upload, StatementUpload
+    from create_test_pdf import draw_statement, plan_statement
+
+    client.post('/api/subscriptions', json={'name': 'Netflix', 'amount': 15.49})
+    transactions, _ = plan_statement(random.Random(3), pages=1, density=30)
+    pdf = io.BytesIO()
+    draw_statement(pdf, transactions, density=30)
+    with app.app_context():
+        upload = StatementUpload(user_id=1, filename='statement.pdf', status='queued')
+        db.session.add(upload)
+        db.session.commit()
+        upload_id = upload.id
+
+    process_upload(app, upload_id, io.BytesIO(pdf.getvalue()))
+
+    assert client.get(f'/api/upload/{upload_id}').get_json()['subscriptions_found'] > 0
+    assert_analytics_match_rebuild(app)
+
+
+def test_analytics_etag_changes_with_every_write(client):
+    first = client.get('/api/analytics')
+    assert client.get('/api/analytics', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    client.post('/api/subscriptions', json={'name': 'Netflix', 'amount': 15.49})
+    second = client.get('/api/analytics', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert second.get_json()['subscription_count'] == 1
+
+
+@pytest.mark.parametrize('query', [
+    'days=0',
+    'days=3661',  # MAX_HORIZON_DAYS + 1
+    'start=2024-03-01&end=2024-02-01',
+    'start=2024-02-30',
+])
+def test_forecast_rejects_bad_horizons(client, query):
+    assert client.get(f'/api/forecast?{query}').status_code == 400
+
+
+def test_forecast_is_cached_per_analytics_version_and_base_currency(app, client):
+    from app_modern import service
+
+    client.post('/api/subscriptions', json={'name': 'Netflix', 'amount': 10, 'next_billing_date': '2024-01-31'})
+    with app.app_context():
+        cache_info = service('forecast').cache_info
+    url = '/api/forecast?start=2024-02-01&end=2024-02-29'
+
+    first = client.get(url).get_json()
+    assert client.get(url).get_json() == first
+    assert (cache_info().hits, cache_info().misses) == (1, 1)
+    assert first['by_day'] == {'2024-02-29': 10.0}
+
+    # A write bumps the analytics version and a base currency change the key, so neither is served stale
+    client.post('/api/subscriptions', json={'name': 'Spotify', 'amount': 8, 'currency': 'EUR',
+                                            'next_billing_date': '2024-02-10'})
+    second = client.get(url).get_json()
+    client.patch('/api/user', json={'base_currency': 'EUR'})
+    third = client.get(url).get_json()
+
+    assert cache_info().misses == 3
+    assert second['currency'] == 'USD' and second['charge_count'] == 2
+    assert third['currency'] == 'EUR'
+    assert third['by_day']['2024-02-10'] == 8.0
+
+
+def test_unknown_currencies_are_rejected(client):
+    sub_id = client.post('/api/subscriptions', json={'name': 'Netflix', 'amount': 10}).get_json()['id']
+
+    for response in [
+        client.post('/api/subscriptions', json={'name': 'Spotify', 'amount': 10, 'currency': 'XYZ'}),
+        client.put(f'/api/subscriptions/{sub_id}', json={'currency': 'XYZ'}),
+        client.patch('/api/user', json={'base_currency': 'XYZ'}),
+    ]:
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Unsupported currency: XYZ'}
+
+
+def test_analytics_convert_to_the_base_currency(client):
+    from fx import fx_table
+
+    client.post('/api/subscriptions', json={'name': 'Netflix', 'amount': 10})
+    client.post('/api/subscriptions', json={'name': 'Spotify', 'amount': 10, 'currency': 'EUR'})
+
+    analytics = client.get('/api/analytics').get_json()
+    assert analytics['currency'] == 'USD'
+    assert analytics['total_monthly'] == round(10 + 10 * fx_table().rate('EUR', 'USD'), 2)
+
+
+def test_duplicate_names_conflict(client):
+    client.post('/api/subscriptions', json={'name': 'Gym Membership', 'amount': 30})
+    other = client.post('/api/subscriptions', json={'name': 'Book Club', 'amount': 5}).get_json()['id']
+
+    duplicate = client.post('/api/subscriptions', json={'name': '  gym   MEMBERSHIP ', 'amount': 30})
+    assert duplicate.status_code == 409
+    assert 'already being tracked' in duplicate.get_json()['error']
+
+    rename = client.put(f'/api/subscriptions/{other}', json={'name': 'GYM membership'})
+    assert rename.status_code == 409
+    assert rename.get_json() == {'error': 'GYM membership is already being tracked'}
+    assert sorted(s['name'] for s in client.get('/api/subscriptions').get_json()) == ['Book Club', 'Gym Membership']
+
+
+def test_detection_inserted_concurrently_is_skipped(app):
+    from sqlalchemy import event, text
+
+    from app_modern import db, save_detected_subscriptions, Subscription
+
+    detected = [{'name': 'Netflix', 'amount': 15.49}, {'name': 'Spotify', 'amount': 9.99}]
+    raced = []
+    with app.app_context():
+        def competing_upload(conn, cursor, statement, *args):
+            # Another worker inserts Netflix after this one checked for existing rows
+            if statement.startswith('INSERT INTO subscription') and not raced:
+                raced.append(statement)
+                with db.engine.begin() as other:
+                    other.execute(text(
+                        "INSERT INTO subscription (user_id, name, name_key, amount, currency, billing_cycle, is_active) "
+                        "VALUES (1, 'Netflix', 'netflix', 19.99, 'USD', 'monthly', 1)"
+                    ))
+
+        event.listen(db.engine, 'before_cursor_execute', competing_upload)
+        try:
+            inserted = save_detected_subscriptions(1, detected)
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', competing_upload)
+
+        assert 'ON CONFLICT' in raced[0]
+        assert inserted == 1
+        assert sorted((s.name, s.amount) for s in Subscription.query) == [('Netflix', 19.99), ('Spotify', 9.99)]
@@ -0,0 +1,118 @@
+import io
+import json
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import app_modern
+from app_modern import db, process_upload, save_transactions, StatementUpload, Transaction
+from create_test_pdf import draw_statement, plan_statement
+from detector import Transaction as Line
+
+PDF = b'%PDF-1.4\n%%EOF\n'
+
+
+def events(body):
+    """(event, data) pairs from a Server-Sent Events body"""
+    parsed = []
+    for block in body.split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n') if line and not line.startswith(':'))
+        if lines:
+            parsed.append((lines['event'], json.loads(lines['data'])))
+    return parsed
+
+
+def statement_pdf(seed=3):
+    transactions, _ = plan_statement(random.Random(seed), pages=1, density=30)
+    pdf = io.BytesIO()
+    draw_statement(pdf, transactions, density=30)
+    return pdf.getvalue()
+
+
+def test_upload_is_queued_and_polled_to_completion(client):
+    response = client.post('/api/upload', data={'file': (io.BytesIO(statement_pdf()), 'statement.pdf')})
+    assert response.status_code == 202
+    assert response.headers['Location'] == f"/api/upload/{response.get_json()['job_id']}"
+
+    deadline = time.monotonic() + 30
+    status = response.get_json()
+    while status['status'] in ('queued', 'processing') and time.monotonic() < deadline:
+        time.sleep(0.05)
+        status = client.get(response.headers['Location']).get_json()
+
+    assert status['status'] == 'done'
+    assert status['subscriptions_found'] == len(status['result']['subscriptions']) > 0
+
+
+def test_full_queue_rejects_uploads_with_retry_after(app, client, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(app_modern, 'process_upload', lambda *args: release.wait(10))
+    app.config.update(UPLOAD_WORKERS=1, UPLOAD_QUEUE_DEPTH=1)
+
+    try:
+        first = client.post('/api/upload', data={'file': (io.BytesIO(PDF), 'a.pdf')})
+        second = client.post('/api/upload', data={'file': (io.BytesIO(PDF), 'b.pdf')})
+    finally:
+        release.set()
+
+    assert first.status_code == 202
+    assert second.status_code == 503
+    assert second.headers['Retry-After'] == '5'
+    # The rejected upload leaves no job behind
+    with app.app_context():
+        assert [u.filename for u in StatementUpload.query] == ['a.pdf']
+
+
+def test_stale_upload_is_reported_failed(app, client):
+    with app.app_context():
+        old = datetime.utcnow() - timedelta(minutes=app.config['UPLOAD_STALE_MINUTES'] + 1)
+        uploads = [StatementUpload(user_id=1, filename=f'{status}.pdf', status=status, uploaded_at=uploaded_at)
+                   for status, uploaded_at in [('processing', old), ('queued', old), ('processing', datetime.utcnow())]]
+        db.session.add_all(uploads)
+        db.session.commit()
+        ids = [u.id for u in uploads]
+
+    statuses = [client.get(f'/api/upload/{job_id}').get_json() for job_id in ids]
+    assert [s['status'] for s in statuses] == ['failed', 'failed', 'processing']
+    assert statuses[0]['error']
+
+
+def test_process_upload_reports_failure_when_it_cannot_start(app):
+    stages = []
+    with pytest.raises(AttributeError):
+        # No such upload, so the first status update raises before the job's own error handling
+        process_upload(app, 999, io.BytesIO(PDF), lambda stage, **details: stages.append(stage))
+    assert stages == ['failed']
+
+
+def test_batch_stream_completes_at_its_deadline(app, client):
+    class IdleQueue:
+        def submit_all(self, fn, arg_lists):
+            pass
+
+    app.config['UPLOAD_BATCH_TIMEOUT'] = 0
+    app.extensions['subscriptions']['upload_queue'] = IdleQueue()
+
+    response = client.post('/api/upload/batch', data={'files': [(io.BytesIO(PDF), 'a.pdf'), (io.BytesIO(PDF), 'b.pdf')]})
+
+    (queued, jobs), (complete, summary) = events(response.get_data(as_text=True))
+    assert (queued, complete) == ('queued', 'complete')
+    assert summary['pending'] == [job['job_id'] for job in jobs['jobs']]
+    assert summary['failed'] == []
+
+
+def test_ledger_keeps_identical_charges_but_not_reuploads(app):
+    coffee = Line(date(2024, 3, 4), 'COFFEE SHOP', 3.5, '2024-03-04 COFFEE SHOP 3.50')
+    lines = [coffee, coffee, Line(date(2024, 3, 5), 'NETFLIX.COM', 15.49, '2024-03-05 NETFLIX.COM 15.49')]
+
+    with app.app_context():
+        save_transactions(1, None, 'a' * 64, lines)
+        save_transactions(1, None, 'a' * 64, lines)  # the same statement uploaded again
+        save_transactions(1, None, 'b' * 64, lines[:1])  # another statement with the same charge
+        db.session.commit()
+
+        assert Transaction.query.filter_by(descriptor='COFFEE SHOP').count() == 3
+        assert Transaction.query.count() == 4
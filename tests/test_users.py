@@ -0,0 +1,43 @@
+from app_modern import db, load_user, Subscription
+
+
+def user_cache(app):
+    return app.extensions['subscriptions']['user_cache']
+
+
+def test_cached_user_is_reused_and_dropped_when_it_changes(app, client):
+    assert client.get('/api/user').get_json()['base_currency'] == 'USD'
+    assert client.get('/api/user').get_json()['base_currency'] == 'USD'
+    assert (user_cache(app).hits, user_cache(app).misses) == (1, 1)
+
+    # The PATCH request is served from the cache too, so the change is made through the merged copy
+    client.patch('/api/user', json={'base_currency': 'EUR'})
+
+    assert client.get('/api/user').get_json()['base_currency'] == 'EUR'
+    assert user_cache(app).misses == 2
+
+
+def test_login_with_a_new_profile_refreshes_the_cached_user(app, client):
+    class Google:
+        def authorize_access_token(self):
+            return {'userinfo': {'email': 'user@example.com', 'name': 'New Name', 'picture': 'https://example.com/p.png'}}
+
+    client.get('/api/user')
+    app.extensions['subscriptions']['google'] = Google()
+
+    client.get('/api/auth/callback')
+
+    assert client.get('/api/user').get_json()['name'] == 'New Name'
+
+
+def test_cached_user_loads_relationships_in_a_later_request(app):
+    with app.app_context():
+        db.session.add(Subscription(user_id=1, name='Netflix', amount=15.49))
+        db.session.commit()
+
+    with app.test_request_context():
+        load_user('1')
+    with app.test_request_context():
+        user = load_user('1')
+        assert user_cache(app).hits == 1
+        assert [s.name for s in user.subscriptions] == ['Netflix']